@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""Ajustes por nome (dx, dy, tamanho) guardados só onde diferem do layout global.
+
+Cada nome é identificado por um ID estável (hash do nome normalizado), então
+os ajustes continuam valendo se a lista for reordenada, filtrada ou reenviada.
+Os dados ficam em arrays NumPy ordenados por ID (uma linha por nome ajustado);
+consultar a lista toda é um searchsorted:
+
+    aj = Ajustes()
+    aj.definir("Maria Silva", dy=10)
+    ids = ids_de(nomes)
+    dx, dy, tamanho = aj.valores(ids, tamanho_padrao=48)
+
+O formato JSON é o mesmo de layout["ajustes"] do engine:
+    {"Maria Silva": {"dx": 0, "dy": 10, "tamanho": 40}}
+"""
+import csv, hashlib, io, json, os
+import numpy as np
+
+import nomes as _nomes
+
+CAMPOS = ("dx", "dy", "tamanho")
+
+def id_nome(nome: str) -> int:
+    """ID de 64 bits do nome (igual entre execuções, ao contrário de hash())."""
+    return int.from_bytes(hashlib.blake2b(_nomes.normalizar(nome).encode("utf-8"), digest_size=8).digest(), "little")
+
+def ids_de(lista) -> np.ndarray:
+    return np.fromiter((id_nome(nm) for nm in lista), dtype=np.uint64, count=len(lista))
+
+class Ajustes:
+    """tamanho 0 = usa o tamanho global; dx/dy 0 = sem deslocamento."""
+    def __init__(self):
+        self.ids = np.empty(0, np.uint64)
+        self.nomes = np.empty(0, object)
+        self.dx = np.empty(0, np.int32)
+        self.dy = np.empty(0, np.int32)
+        self.tamanho = np.empty(0, np.int32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _linha(self, i):
+        pos = np.searchsorted(self.ids, i)
+        return pos, pos < len(self.ids) and self.ids[pos] == i
+
+    def obter(self, nome, tamanho_padrao):
+        """(dx, dy, tamanho) do nome."""
+        pos, achou = self._linha(id_nome(nome))
+        if not achou:
+            return 0, 0, tamanho_padrao
+        return int(self.dx[pos]), int(self.dy[pos]), int(self.tamanho[pos]) or tamanho_padrao
+
+    def definir(self, nome, dx=None, dy=None, tamanho=None):
+        """Muda só os campos informados; tamanho=0 volta ao tamanho global."""
+        i = id_nome(nome)
+        pos, achou = self._linha(i)
+        if not achou:
+            self.ids = np.insert(self.ids, pos, i)
+            self.nomes = np.insert(self.nomes, pos, _nomes.normalizar(nome))
+            for campo in CAMPOS:
+                setattr(self, campo, np.insert(getattr(self, campo), pos, 0))
+        for campo, v in zip(CAMPOS, (dx, dy, tamanho)):
+            if v is not None:
+                getattr(self, campo)[pos] = int(v)
+        if not (self.dx[pos] or self.dy[pos] or self.tamanho[pos]):
+            self._remover(np.array([pos]))
+
+    def _remover(self, posicoes):
+        for campo in ("ids", "nomes") + CAMPOS:
+            setattr(self, campo, np.delete(getattr(self, campo), posicoes))
+
+    def valores(self, ids, tamanho_padrao):
+        """Arrays (dx, dy, tamanho) alinhados com ids (ver ids_de)."""
+        if not len(self.ids):
+            zero = np.zeros(len(ids), np.int32)
+            return zero, zero.copy(), np.full(len(ids), tamanho_padrao, np.int32)
+        pos = np.minimum(np.searchsorted(self.ids, ids), len(self.ids) - 1)
+        achou = self.ids[pos] == ids
+        dx, dy, tam = (np.where(achou, getattr(self, c)[pos], 0) for c in CAMPOS)
+        return dx, dy, np.where(tam > 0, tam, tamanho_padrao)
+
+    def atualizar(self, lista, dx=None, dy=None, tamanho=None, tamanho_padrao=0):
+        """Grava de uma vez os valores (arrays/listas alinhados com `lista`) de vários nomes.
+           Campos None ficam como estão; tamanho igual a tamanho_padrao vira "usa o global"."""
+        ids = ids_de(lista)
+        atual = self.valores(ids, 0)
+        novos = [np.asarray(v if v is not None else a, dtype=np.int32) for v, a in zip((dx, dy, tamanho), atual)]
+        if tamanho is not None and tamanho_padrao:
+            novos[2] = np.where(novos[2] == tamanho_padrao, 0, novos[2])
+        # tira as linhas antigas desses nomes e junta as que ainda têm algum ajuste
+        self._remover(np.flatnonzero(np.isin(self.ids, ids)))
+        _, unicos = np.unique(ids, return_index=True)  # repetidos: vale o primeiro
+        manter = unicos[(novos[0][unicos] != 0) | (novos[1][unicos] != 0) | (novos[2][unicos] != 0)]
+        normalizados = np.array([_nomes.normalizar(lista[k]) for k in manter], dtype=object)
+        self.ids = np.concatenate([self.ids, ids[manter]])
+        self.nomes = np.concatenate([self.nomes, normalizados])
+        for campo, v in zip(CAMPOS, novos):
+            setattr(self, campo, np.concatenate([getattr(self, campo), v[manter]]))
+        ordem = np.argsort(self.ids, kind="stable")
+        for campo in ("ids", "nomes") + CAMPOS:
+            setattr(self, campo, getattr(self, campo)[ordem])
+
+    def limpar(self):
+        self.__init__()
+
+    # --------------------------
+    # Importar / exportar
+    # --------------------------
+    def como_dict(self) -> dict:
+        """{nome: {"dx", "dy", "tamanho"}} só com os campos ajustados (formato de layout["ajustes"])."""
+        out = {}
+        for k in range(len(self.ids)):
+            out[self.nomes[k]] = {c: int(getattr(self, c)[k]) for c in CAMPOS if getattr(self, c)[k]}
+        return out
+
+    def exportar_json(self) -> str:
+        return json.dumps(self.como_dict(), ensure_ascii=False, indent=2)
+
+    def exportar_csv(self) -> str:
+        b = io.StringIO()
+        w = csv.writer(b)
+        w.writerow(("nome",) + CAMPOS)
+        for k in range(len(self.ids)):
+            w.writerow((self.nomes[k], int(self.dx[k]), int(self.dy[k]), int(self.tamanho[k]) or ""))
+        return b.getvalue()
+
+    def importar_dict(self, dados: dict):
+        """Aplica {nome: {"dx", "dy", "tamanho"}}; nada muda se algum valor for inválido (ValueError)."""
+        if not isinstance(dados, dict) or not all(isinstance(v, dict) for v in dados.values()):
+            raise ValueError('ajustes inválidos: o esperado é {"nome": {"dx": 0, "dy": 10, "tamanho": 40}}')
+        lista = list(dados)
+        col = lambda c: [_inteiro(nm, c, dados[nm].get(c)) for nm in lista]
+        self.atualizar(lista, col("dx"), col("dy"), col("tamanho"))
+
+    def importar(self, arquivo):
+        """Lê ajustes de .json (formato de como_dict) ou .csv (nome,dx,dy,tamanho); caminho ou arquivo."""
+        if isinstance(arquivo, (str, os.PathLike)):
+            with open(arquivo, "rb") as fh:
+                raw, nome = fh.read(), os.fspath(arquivo)
+        else:
+            raw, nome = arquivo.read(), str(getattr(arquivo, "name", ""))
+        if isinstance(raw, bytes):
+            raw = raw.decode(_nomes.detectar_codificacao(raw))
+        if nome.lower().endswith(".json") or raw.lstrip().startswith("{"):
+            try:
+                dados = json.loads(raw)
+            except ValueError as e:
+                raise ValueError(f"ajustes inválidos: o JSON não pôde ser lido ({e})") from None
+            return self.importar_dict(dados)
+        linhas = csv.DictReader(io.StringIO(raw.lstrip("\ufeff")), delimiter=_nomes.detectar_separador(raw[:65536]))
+        if "nome" not in [(k or "").strip().lower() for k in linhas.fieldnames or ()]:
+            raise ValueError("ajustes inválidos: o CSV precisa do cabeçalho nome,dx,dy,tamanho")
+        dados = {}
+        for row in linhas:
+            row = {(k or "").strip().lower(): v for k, v in row.items()}
+            if row.get("nome"):
+                dados[row["nome"]] = {c: row[c] for c in CAMPOS if isinstance(row.get(c), str) and row[c].strip()}
+        self.importar_dict(dados)
+
+def _inteiro(nome, campo, v) -> int:
+    """Valor de um campo importado como int (vazio/None = 0); ValueError com o nome se não for número."""
+    try:
+        return int(float(v)) if v not in (None, "") else 0
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"ajustes inválidos: {campo} de {nome!r} é {v!r}, não um número") from None
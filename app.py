@@ -3,81 +3,26 @@
 # Gerador de Certificados - PDF no tamanho ORIGINAL do certificado (sem A4)
 
 import streamlit as st
-from PIL import Image, ImageDraw, ImageFont
-import pandas as pd
-from io import BytesIO
-import zipfile
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
+from PIL import Image
+import json
+import pathlib
+import numpy as np
+
+from engine import load_font, draw_name_on_image, read_names, produtor, amostra, ler_resolucoes
+from perfis import PERFIS, PERFIL_PADRAO, medir
+from pool import workers_padrao
+import cache
+import cache_disco
+import trabalhos
+import autoajuste
+import nomes
+from ajustes import Ajustes, ids_de
 
 st.set_page_config(page_title="Gerador de Certificados", page_icon="🎓", layout="wide")
 
 # --------------------------
 # Helpers
 # --------------------------
-def load_font(font_file, size):
-    try:
-        if font_file is not None:
-            return ImageFont.truetype(font_file, size)
-        return ImageFont.truetype("Bentosa.ttf", size)
-    except Exception:
-        return ImageFont.load_default()
-
-def draw_name_on_image(img: Image.Image, name: str, x: int, y: int, font, color, align: str):
-    im = img.copy()
-    draw = ImageDraw.Draw(im)
-    anchor = {"Esquerda":"la", "Centro":"mm", "Direita":"ra"}.get(align, "mm")
-    draw.text((x, y), name, fill=color, font=font, anchor=anchor)
-    return im
-
-def pil_list_to_pdf_original(images):
-    '''Gera PDF multipágina usando o TAMANHO ORIGINAL de cada imagem.'''
-    if not images:
-        return b""
-    buf = BytesIO()
-    # Canvas inicial com o tamanho da primeira imagem
-    first = images[0].convert("RGB")
-    w0, h0 = first.size  # pixels tratados como points (sem margens)
-    c = canvas.Canvas(buf, pagesize=(w0, h0))
-    def draw_page(img):
-        im = img.convert("RGB")
-        w, h = im.size
-        c.setPageSize((w, h))
-        c.drawImage(ImageReader(im), 0, 0, width=w, height=h)
-        c.showPage()
-    for im in images:
-        draw_page(im)
-    c.save()
-    buf.seek(0)
-    return buf.read()
-
-def read_names(file):
-    if file is None: return []
-    try:
-        file.seek(0)
-    except Exception:
-        pass
-    if file.name.lower().endswith(".txt"):
-        content = file.read()
-        for enc in ("utf-8", "latin-1", "cp1252"):
-            try:
-                text = content.decode(enc)
-                break
-            except Exception:
-                continue
-        names = [l.strip() for l in text.splitlines() if l.strip()]
-    else:
-        names = pd.read_csv(file).iloc[:,0].dropna().astype(str).tolist()
-    return names
-
-def zip_bytes(files):
-    zbuf = BytesIO()
-    with zipfile.ZipFile(zbuf, "w", compression=zipfile.ZIP_DEFLATED) as z:
-        for fname, fbytes in files:
-            z.writestr(fname, fbytes)
-    zbuf.seek(0)
-    return zbuf
-
 def css_inject(css):
     st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
 
@@ -123,9 +68,28 @@ with st.sidebar:
     st.markdown("\n")
     st.markdown("## Exportar Arquivos")
     with st.container(border=True):
-        out_fmt = st.selectbox("Formato de saída:", ["PDF (individual)", "PNG (individual)", "JPEG (individual)"])
+        out_fmt = st.selectbox("Formato de saída:", ["PDF (individual)", "PNG (individual)", "JPEG (individual)", "PDF (arquivo único)"])
+        paginas_por_arquivo = 0
+        if out_fmt == "PDF (arquivo único)":
+            paginas_por_arquivo = st.number_input("Páginas por arquivo (0 = tudo num PDF)", min_value=0, value=0, step=100)
         out_name_tpl = st.text_input("Padrão do nome do arquivo:", "{name}")
         st.caption("Use {name} para o nome da pessoa. Ex: Certificado_{name}")
+        perfil = st.selectbox("Perfil de codificação", list(PERFIS), index=list(PERFIS).index(PERFIL_PADRAO),
+                              help="fast: mais rápido e maior · balanced: meio-termo · smallest: menor e mais lento")
+        resolucoes, filtro = None, "lanczos"
+        if out_fmt != "PDF (arquivo único)":
+            texto_res = st.text_input("Resoluções de saída", "", placeholder="original, 1200, 3508@300",
+                                      help="Largura em px (ou original), com @dpi opcional. Cada nome sai em todas "
+                                           "numa passada só; vazio = só o tamanho do modelo.")
+            try:
+                resolucoes = ler_resolucoes(texto_res)
+            except ValueError as e:
+                st.error(str(e))
+            if resolucoes:
+                filtro = st.selectbox("Filtro de redimensionamento", list(cache.FILTROS),
+                                      help="lanczos: mais nítido · area: bom para reduzir muito · vizinho: sem suavizar")
+        modo_faixa = st.checkbox("Codificar só a faixa do nome (PNG/JPEG, mais rápido)", value=False)
+        n_workers = st.number_input("Processos em paralelo", min_value=1, max_value=workers_padrao(), value=1, step=1)
 
 # --------------------------
 # Header e uploads
@@ -141,116 +105,265 @@ with c2:
     up_back = st.file_uploader("", type=["png","jpg","jpeg"], key="back")
 with c3:
     st.markdown("<div class='label'>Lista de nomes</div>", unsafe_allow_html=True)
-    up_names = st.file_uploader("", type=["txt","csv"], key="names")
+    up_names = st.file_uploader("", type=["txt","csv","xlsx"], key="names")
+    coluna_nomes, sem_repetidos = None, True
+    if up_names is not None and not up_names.name.lower().endswith(".txt"):
+        try:
+            cabecalho = nomes.colunas(up_names)
+        except ImportError as e:
+            st.error(str(e)); cabecalho = []
+        if cabecalho:
+            coluna_nomes = st.selectbox("Coluna dos nomes", range(len(cabecalho)), format_func=lambda i: cabecalho[i],
+                                        index=nomes.indice_padrao(cabecalho))
+    if up_names is not None:
+        sem_repetidos = st.checkbox("Remover nomes repetidos", value=True)
 
 st.markdown("<div class='center-h'><h2>Previews</h2></div>", unsafe_allow_html=True)
 
 # --------------------------
 # Previews dinâmicos (um por nome)
 # --------------------------
-names = read_names(up_names)
-st.session_state["__names__"] = names  # cache para exportação
+# a lista só é relida quando o arquivo ou as opções mudam (não a cada interação)
+chave_nomes = (up_names.file_id, coluna_nomes, sem_repetidos) if up_names is not None else None
+if "__names__" not in st.session_state or st.session_state.get("__names_chave__") != chave_nomes:
+    try:
+        st.session_state["__names__"] = read_names(up_names, coluna_nomes, sem_repetidos)  # cache para exportação
+    except ImportError:  # .xlsx sem openpyxl (o erro já aparece acima)
+        st.session_state["__names__"] = []
+    except ValueError as e:  # coluna inexistente ou codificações misturadas
+        st.error(str(e))
+        st.session_state["__names__"] = []
+    st.session_state["__names_chave__"] = chave_nomes
+names = st.session_state["__names__"]
 if not names:
     names = ["nome da pessoa"]
 
-# Estados por nome
-for idx, nm in enumerate(names):
-    if f"dx_{idx}" not in st.session_state: st.session_state[f"dx_{idx}"] = 0
-    if f"dy_{idx}" not in st.session_state: st.session_state[f"dy_{idx}"] = 0
-    if f"size_{idx}" not in st.session_state: st.session_state[f"size_{idx}"] = base_font_size
-
-def render_preview(idx, nm, front_bytes):
+# Ajustes por nome: um objeto só, com arrays dos nomes que fogem do global, chaveados pelo
+# ID do nome (não pela posição), então valem mesmo se a lista for reordenada ou reenviada
+aj = st.session_state.setdefault("__ajustes__", Ajustes())
+if st.session_state.get("__ids_chave__") != (chave_nomes, len(names)):
+    st.session_state["__ids__"] = ids_de(names)
+    st.session_state["__ids_chave__"] = (chave_nomes, len(names))
+ids = st.session_state["__ids__"]
+
+def _limpar_controles():
+    """Descarta o estado dos sliders/campos dos cards (relidos do store no próximo desenho)."""
+    for k in [k for k in st.session_state if str(k).startswith(("ctrl_", "num_"))]:
+        del st.session_state[k]
+
+if st.session_state.get("__tamanho_base__") != base_font_size:
+    st.session_state["__tamanho_base__"] = base_font_size
+    _limpar_controles()
+
+with st.expander(f"Ajustes por nome ({len(aj)} nome(s) fora do padrão)"):
+    ci, ce1, ce2, cl = st.columns([2, 1, 1, 1])
+    with ci:
+        up_aj = st.file_uploader("Importar ajustes (.csv ou .json)", type=["csv", "json"], key="aj_up")
+        if up_aj is not None and st.session_state.get("__aj_importado__") != up_aj.file_id:
+            try:
+                aj.importar(up_aj)
+            except ValueError as e:
+                st.error(f"Não foi possível importar os ajustes: {e}")
+            else:
+                st.session_state["__aj_importado__"] = up_aj.file_id
+                _limpar_controles()
+    with ce1:
+        st.download_button("Exportar CSV", aj.exportar_csv(), file_name="ajustes.csv", mime="text/csv")
+    with ce2:
+        st.download_button("Exportar JSON", aj.exportar_json(), file_name="ajustes.json", mime="application/json")
+    with cl:
+        if st.button("Limpar ajustes"):
+            aj.limpar()
+            _limpar_controles()
+    if st.toggle("Editar em tabela", key="aj_tabela"):
+        dx_t, dy_t, sz_t = aj.valores(ids, base_font_size)
+        editado = st.data_editor({"nome": list(names), "dx": dx_t.tolist(), "dy": dy_t.tolist(), "tamanho": sz_t.tolist()},
+                                 disabled=["nome"], use_container_width=True, key="aj_editor")
+        # célula apagada volta ao valor de antes
+        novos = [np.array([v if v is not None else d for v, d in zip(editado[c], atual)], dtype=np.int64)
+                 for c, atual in zip(("dx", "dy", "tamanho"), (dx_t, dy_t, sz_t))]
+        if any((n != a).any() for n, a in zip(novos, (dx_t, dy_t, sz_t))):
+            aj.atualizar(names, *novos, tamanho_padrao=base_font_size)
+            _limpar_controles()
+
+font_bytes = font_upload.getvalue() if font_upload is not None else None
+
+with st.expander("Tamanho automático (caber numa caixa)"):
+    st.caption("Calcula, para cada nome da lista, o maior tamanho em que ele cabe na caixa (px do modelo) "
+               "e grava nos ajustes por nome.")
+    ca1, ca2, ca3 = st.columns(3)
+    with ca1:
+        caixa_l = st.number_input("Largura da caixa (px)", min_value=1, value=1200, step=10)
+    with ca2:
+        caixa_a = st.number_input("Altura da caixa (px, 0 = livre)", min_value=0, value=0, step=10)
+    with ca3:
+        so_reduzir = st.checkbox("Só reduzir (nunca acima do tamanho atual)", value=True)
+    if st.button("Ajustar todos os nomes"):
+        _, _, atual = aj.valores(ids, base_font_size)
+        teto = np.maximum(1, (atual * g_scale).astype(int)) if so_reduzir else 300
+        px = autoajuste.tamanhos(font_bytes, names, int(caixa_l), int(caixa_a) or None, minimo=1, maximo=teto)
+        aj.atualizar(names, tamanho=np.maximum(1, (px / g_scale).astype(int)), tamanho_padrao=base_font_size)
+        _limpar_controles()
+        st.success(f"{int((px < teto).sum()) if so_reduzir else len(names)} nome(s) com tamanho ajustado.")
+
+PREVIEW_LARGURA = 800  # px da imagem reduzida usada nos cards
+LIMITES = {"dx": (-2000, 2000), "dy": (-2000, 2000), "tamanho": (6, 300)}  # dos sliders
+
+def _no_slider(campo, v):
+    lo, hi = LIMITES[campo]
+    return min(max(v, lo), hi)
+
+def _mudou(nm, campo, origem, espelho, k):
+    v = int(st.session_state[origem])
+    st.session_state[espelho] = _no_slider(campo, v) if espelho.startswith("ctrl_") else v
+    # o mesmo nome repetido na lista (sem remover repetidos) tem outros cards com o mesmo ajuste:
+    # descarta o estado deles para serem relidos do store
+    for chave in [c for c in st.session_state if str(c).startswith((f"ctrl_{campo}_{k}_", f"num_{campo}_{k}_"))]:
+        if chave not in (origem, espelho):
+            del st.session_state[chave]
+    if campo == "tamanho" and v == base_font_size:
+        v = 0  # volta a seguir o tamanho base
+    aj.definir(nm, **{campo: v})
+
+def render_preview(idx, nm, base_full, base_proxy):
     st.markdown("<div class='preview-card'>", unsafe_allow_html=True)
-    cA,cB,cC = st.columns(3)
-    with cA:
-        st.session_state[f"dx_{idx}"] = st.slider("dx (slider)", min_value=-2000, max_value=2000, value=st.session_state[f"dx_{idx}"], step=1, key=f"ctrl_dx_{idx}")
-    with cB:
-        st.session_state[f"dy_{idx}"] = st.slider("dy (slider)", min_value=-2000, max_value=2000, value=st.session_state[f"dy_{idx}"], step=1, key=f"ctrl_dy_{idx}")
-    with cC:
-        st.session_state[f"size_{idx}"] = st.slider("tamanho (slider)", min_value=6, max_value=300, value=st.session_state[f"size_{idx}"], step=1, key=f"ctrl_size_{idx}")
-    cn1, cn2, cn3 = st.columns(3)
-    with cn1:
-        st.session_state[f"dx_{idx}"] = st.number_input("dx (numérico)", value=st.session_state[f"dx_{idx}"], step=1, key=f"num_dx_{idx}")
-    with cn2:
-        st.session_state[f"dy_{idx}"] = st.number_input("dy (numérico)", value=st.session_state[f"dy_{idx}"], step=1, key=f"num_dy_{idx}")
-    with cn3:
-        st.session_state[f"size_{idx}"] = st.number_input("tamanho (numérico)", value=st.session_state[f"size_{idx}"], step=1, key=f"num_size_{idx}")
-
-    if front_bytes is not None:
-        try: front_bytes.seek(0)
-        except Exception: pass
-        base = Image.open(front_bytes).convert("RGB")
-    else:
-        base = Image.new("RGB", (1280, 720), "#111111")
-
-    font = load_font(font_upload, int(st.session_state[f"size_{idx}"] * g_scale))
+    k = format(int(ids[idx]), "x")  # o ajuste é do nome (ID); os widgets são do card
+    w = f"{k}_{idx}"
+    valores = dict(zip(("dx", "dy", "tamanho"), aj.obter(nm, base_font_size)))
+    for campo, v in valores.items():
+        st.session_state.setdefault(f"ctrl_{campo}_{w}", _no_slider(campo, v))
+        st.session_state.setdefault(f"num_{campo}_{w}", v)
+    for col, campo in zip(st.columns(3), valores):
+        with col:
+            st.slider(f"{campo} (slider)", *LIMITES[campo], step=1, key=f"ctrl_{campo}_{w}",
+                      on_change=_mudou, args=(nm, campo, f"ctrl_{campo}_{w}", f"num_{campo}_{w}", k))
+    for col, campo in zip(st.columns(3), valores):
+        with col:
+            st.number_input(f"{campo} (numérico)", step=1, key=f"num_{campo}_{w}",
+                            on_change=_mudou, args=(nm, campo, f"num_{campo}_{w}", f"ctrl_{campo}_{w}", k))
+    dx, dy, size = valores.values()
+
+    # Card em resolução reduzida; resolução total só quando inspecionado
+    full = st.toggle("Resolução total", key=f"full_{w}")
+    base = base_full if full else base_proxy
+    esc = base.width / base_full.width
+
+    font = load_font(font_bytes, max(1, int(size * g_scale * esc)))
     out = draw_name_on_image(
-        base, nm, int(g_x + st.session_state[f"dx_{idx}"]), int(g_y + st.session_state[f"dy_{idx}"]),
+        base, nm, int((g_x + dx) * esc), int((g_y + dy) * esc),
         font, font_color, g_align
     )
     st.image(out, use_container_width=True, caption=nm)
     st.markdown("</div>", unsafe_allow_html=True)
 
-# Grid 3 colunas
+# Grid 3 colunas, paginado: só os cards da página atual são desenhados
+if up_front is not None:
+    base_full = cache.imagem(up_front.getvalue())
+    base_proxy = cache.proxy(up_front.getvalue(), PREVIEW_LARGURA)
+else:
+    base_full = base_proxy = Image.new("RGB", (1280, 720), "#111111")
+
+pg1, pg2 = st.columns([1, 3])
+with pg1:
+    por_pagina = st.selectbox("Cards por página", [6, 12, 30, 60], index=0)
+n_paginas = (len(names) + por_pagina - 1) // por_pagina
+with pg2:
+    pagina = st.number_input(f"Página (de {n_paginas})", min_value=1, max_value=n_paginas, value=1, step=1) if n_paginas > 1 else 1
+inicio = (int(pagina) - 1) * por_pagina
+
 cols = st.columns(3, gap="large")
-for i, nm in enumerate(names):
-    with cols[i % 3]:
-        render_preview(i, nm, up_front)
+for i in range(inicio, min(inicio + por_pagina, len(names))):
+    with cols[(i - inicio) % 3]:
+        render_preview(i, names[i], base_full, base_proxy)
 
 st.divider()
 
 # --------------------------
 # Geração de arquivos
 # --------------------------
-gen = st.button("Gerar e baixar .zip", type="primary", use_container_width=True, disabled=up_front is None or len(st.session_state.get("__names__", [])) == 0)
+layout = {"x": g_x, "y": g_y, "alinhamento": g_align, "escala": g_scale,
+          "cor": font_color, "padrao_nome": out_name_tpl}
+dx_a, dy_a, sz_a = aj.valores(ids, base_font_size)
+ajuste = lambda i, nm: (int(dx_a[i]), int(dy_a[i]), int(sz_a[i]))
+
+with st.expander("Comparar perfis de codificação"):
+    if st.button("Medir no 1º certificado", disabled=up_front is None):
+        img = amostra(base_full, names, layout, font_bytes, ajuste)
+        st.table([{"formato": f, **r} for f in ("PNG", "JPEG") for r in medir(img, f)])
+
+# --------------------------
+# Geração em segundo plano (trabalhos.py): continua se a página for recarregada
+# e, cancelada ou interrompida, retoma de onde parou com as mesmas entradas
+# --------------------------
+fmt = "PDF (único)" if out_fmt == "PDF (arquivo único)" else out_fmt.split(" ")[0]  # PDF/PNG/JPEG
+names_all = st.session_state.get("__names__", [])
+chave = None
+if up_front is not None and names_all:
+    chave = trabalhos.chave(up_front.getvalue(), up_back.getvalue() if up_back is not None else None,
+                            names_all, layout, fmt, font_bytes, dx_a, dy_a, sz_a, perfil, modo_faixa,
+                            int(paginas_por_arquivo), resolucoes, filtro)
+trabalho = trabalhos.obter(chave) if chave else None
+prontos = trabalhos.checkpoint(chave) if chave and trabalho is None else 0
+rotulo = f"Continuar geração ({prontos} prontos)" if prontos else "Gerar e baixar .zip"
+gen = st.button(rotulo, type="primary", use_container_width=True, disabled=chave is None)
 
 if gen:
-    fmt = out_fmt.split(" ")[0]  # PDF/PNG/JPEG
-    try: up_front.seek(0)
-    except Exception: pass
-    front_img = Image.open(up_front).convert("RGB")
-    back_img = None
-    if up_back is not None:
-        try: up_back.seek(0)
-        except Exception: pass
-        back_img = Image.open(up_back).convert("RGB")
-
-    files = []
-    names_all = st.session_state.get("__names__", [])
-    if not names_all and up_names is not None:
-        names_all = read_names(up_names)
-
-    for i, nm in enumerate(names_all):
-        dx = st.session_state.get(f"dx_{i}", 0)
-        dy = st.session_state.get(f"dy_{i}", 0)
-        sz = st.session_state.get(f"size_{i}", base_font_size)
-        font = load_font(font_upload, int(sz * g_scale))
-
-        out_img = draw_name_on_image(front_img, nm, int(g_x + dx), int(g_y + dy), font, font_color, g_align)
-        fname_base = out_name_tpl.format(name=nm)
-
-        if fmt == "PNG":
-            b = BytesIO(); out_img.save(b, "PNG", optimize=True); b.seek(0)
-            files.append((f"{fname_base}.png", b.read()))
-            if back_img is not None:
-                b2 = BytesIO(); back_img.save(b2, "PNG", optimize=True); b2.seek(0)
-                files.append((f"{fname_base}_verso.png", b2.read()))
-        elif fmt == "JPEG":
-            b = BytesIO(); out_img.save(b, "JPEG", quality=95, subsampling=0); b.seek(0)
-            files.append((f"{fname_base}.jpg", b.read()))
-            if back_img is not None:
-                b2 = BytesIO(); back_img.save(b2, "JPEG", quality=95, subsampling=0); b2.seek(0)
-                files.append((f"{fname_base}_verso.jpg", b2.read()))
-        else:
-            # PDF: frente + verso no MESMO arquivo, no tamanho ORIGINAL das imagens
-            pages = [out_img]
-            if back_img is not None:
-                pages.append(back_img)
-            pdf_bytes = pil_list_to_pdf_original(pages)
-            files.append((f"{fname_base}.pdf", pdf_bytes))
-
-    z = zip_bytes(files)
-    st.download_button("📦 Baixar ZIP", data=z, file_name="certificados.zip", mime="application/zip", use_container_width=True)
+    # a geração anterior desta sessão (outras entradas) já foi baixada ou abandonada: libera o disco
+    anterior = trabalhos.obter(st.session_state.get("__trabalho__"))
+    if anterior is not None and anterior.chave != chave and anterior.situacao != "rodando":
+        anterior.descartar()
+    front_img = cache.imagem(up_front.getvalue())
+    back_img = cache.imagem(up_back.getvalue()) if up_back is not None else None
+    produzir, total = produtor(front_img, back_img, names_all, layout, fmt, int(paginas_por_arquivo),
+                               fonte=font_bytes, ajustes=lambda i, nm, a=(dx_a, dy_a, sz_a): (int(a[0][i]), int(a[1][i]), int(a[2][i])),
+                               workers=int(n_workers), faixa=modo_faixa, perfil=perfil, disco=cache_disco.padrao(),
+                               resolucoes=resolucoes, filtro=filtro)
+    trabalho = trabalhos.iniciar(chave, produzir, total, perfil)
+    st.session_state["__trabalho__"] = chave
+
+def _painel(t):
+    e = t.estado()
+    if e["estado"] == "rodando":
+        eta = f" · faltam ~{e['eta_s']:.0f} s" if e["eta_s"] is not None else ""
+        vel = f" · {e['por_s']} nomes/s" if e["por_s"] else ""
+        st.progress(e["feitos"] / max(e["total"], 1), text=f"{e['feitos']}/{e['total']}{vel}{eta}")
+        if st.button("Cancelar"):
+            t.cancelar()
+            st.rerun()
+    elif e["estado"] == "erro":
+        st.error(f"A geração falhou: {e['erro']}")
+    elif e["estado"] == "cancelado":
+        st.warning(f"Geração cancelada em {e['feitos']}/{e['total']}. Os prontos ficam guardados: "
+                   "gerar de novo com as mesmas entradas continua daí.")
+    elif e["estado"] == "concluido":
+        if st.session_state.get("__relatorio_de__") != t.chave:
+            # a geração acabou durante a atualização do painel: recarrega a página para mostrar o relatório
+            st.session_state["__relatorio__"] = t.relatorio
+            st.session_state["__relatorio_de__"] = t.chave
+            st.rerun()
+        # o ZIP só é lido quando o botão é clicado, não a cada atualização da página
+        st.download_button("📦 Baixar ZIP", data=pathlib.Path(e["zip"]).read_bytes, file_name="certificados.zip",
+                           mime="application/zip", use_container_width=True)
+    if e["estado"] != "rodando" and st.button("Descartar arquivos gerados"):
+        t.descartar()
+        st.rerun()
+
+if trabalho is not None:
+    # só o painel é atualizado a cada segundo enquanto o trabalho roda, não a página inteira
+    st.fragment(_painel, run_every=1 if trabalho.situacao == "rodando" else None)(trabalho)
+
+if "__relatorio__" in st.session_state:
+    rel = st.session_state["__relatorio__"]
+    with st.expander(f"Desempenho da última geração: {rel['total_s']} s, {rel['nomes_por_s']} nomes/s"):
+        st.table([{"etapa": nome, **e} for nome, e in rel["etapas"].items()])
+        lat = rel["latencia_ms"]
+        st.caption(f"Latência por nome (ms): p50 {lat['p50']} · p90 {lat['p90']} · p99 {lat['p99']} · máx {lat['max']}. "
+                   + (f"Pico de memória do servidor durante a geração: {rel['pico_rss'] / 2**20:.0f} MiB"
+                      if rel["pico_rss"] else "Pico de memória: não disponível neste sistema")
+                   + (f" (workers: {rel['pico_rss_workers'] / 2**20:.0f} MiB)" if rel["pico_rss_workers"] else "")
+                   + ". Com vários workers o tempo das etapas é a soma dos processos.")
+        st.download_button("Baixar relatório (JSON)", data=json.dumps(rel, ensure_ascii=False, indent=2),
+                           file_name="relatorio.json", mime="application/json")
 
 st.markdown("<br><br>", unsafe_allow_html=True)
 st.markdown("""<div class='center-h'><div style='max-width:900px;text-align:center' class='caption'>
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""Tamanho de fonte automático: o maior tamanho em que cada nome cabe numa caixa.
+
+Em vez de medir cada nome com textbbox em cada tamanho candidato, guarda a
+tabela de avanços (largura de cada caractere) por (fonte, tamanho) e calcula a
+largura de todos os nomes de uma vez com NumPy, numa busca binária sobre os
+tamanhos feita em paralelo para a lista toda. No fim, o resultado de cada nome
+é conferido com a medida real da fonte (kerning/ligaduras).
+"""
+import numpy as np
+
+import fontes
+
+_TABELAS = {}  # (hash da fonte, tamanho) -> {caractere: avanço em px}
+
+def avancos(fonte, size: int, chars) -> np.ndarray:
+    """Avanço (px) de cada caractere no tamanho dado, medindo só os que ainda não estão na tabela."""
+    return _avancos(fontes.registrar(fonte), int(size), chars)
+
+def _avancos(h, size, chars):
+    tabela = _TABELAS.setdefault((h, size), {})
+    faltam = [c for c in chars if c not in tabela]
+    if faltam:
+        font = fontes._pil(h, size)
+        for c in faltam:
+            tabela[c] = font.getlength(c)
+    return np.fromiter((tabela[c] for c in chars), dtype=np.float64, count=len(chars))
+
+def _altura_maxima(h, altura, minimo, maximo) -> int:
+    """Maior tamanho cuja altura de linha (ascendente + descendente) cabe em `altura`."""
+    lo, hi = minimo, maximo
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if sum(fontes._pil(h, mid).getmetrics()) <= altura:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+def tamanhos(fonte, lista, largura, altura=None, minimo=6, maximo=300, conferir=True) -> np.ndarray:
+    """Para cada nome, o maior tamanho (px, entre minimo e maximo) em que ele cabe em largura x altura.
+       maximo pode ser um array (um teto por nome). Nomes que não cabem nem no mínimo ficam com o mínimo.
+       conferir=False pula a medida real no fim (mais rápido; ignora kerning)."""
+    n = len(lista)
+    h = fontes.registrar(fonte)  # o hash da fonte é calculado uma vez só
+    teto = np.broadcast_to(np.asarray(maximo, dtype=np.int64), (n,)).copy()
+    if altura:
+        teto = np.minimum(teto, _altura_maxima(h, altura, minimo, int(teto.max(initial=minimo))))
+    if n == 0:
+        return teto
+    # todos os nomes concatenados num array só de índices de caracteres (na tabela de únicos)
+    lens = np.fromiter((len(nm) for nm in lista), dtype=np.int64, count=n)
+    cps = np.frombuffer("".join(lista).encode("utf-32-le"), dtype=np.uint32)
+    unicos, inv = np.unique(cps, return_inverse=True)
+    chars = [chr(c) for c in unicos]
+    inicios = np.concatenate([[0], np.cumsum(lens)[:-1]])
+
+    def larguras(idx, size):
+        """Larguras (soma dos avanços) dos nomes idx no tamanho size."""
+        ls = lens[idx]
+        total = int(ls.sum())
+        if total == 0:
+            return np.zeros(len(idx))
+        base = np.repeat(inicios[idx] - (np.cumsum(ls) - ls), ls)
+        adv = _avancos(h, size, chars)[inv[base + np.arange(total)]]
+        soma = np.zeros(len(idx))
+        com = ls > 0
+        soma[com] = np.add.reduceat(adv, (np.cumsum(ls) - ls)[com])
+        return soma
+
+    lo = np.full(n, minimo, dtype=np.int64)
+    hi = np.maximum(teto, minimo)
+    while True:
+        ativos = np.flatnonzero(lo < hi)
+        if not len(ativos):
+            break
+        mid = (lo[ativos] + hi[ativos] + 1) // 2
+        # um passo da busca: agrupa por tamanho candidato (uma tabela de avanços por tamanho)
+        for size in np.unique(mid):
+            idx = ativos[mid == size]
+            cabe = larguras(idx, int(size)) <= largura
+            lo[idx[cabe]] = size
+            hi[idx[~cabe]] = size - 1
+    # conferência com a medida real (kerning/ligaduras podem mudar a soma dos avanços)
+    for k in range(n if conferir else 0):
+        while lo[k] > minimo and fontes._pil(h, int(lo[k])).getlength(lista[k]) > largura:
+            lo[k] -= 1
+    return lo
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""Benchmark reprodutível de todos os caminhos de exportação.
+
+    python -m bench                         # matriz rápida (720p/1080p, 10 e 100 nomes)
+    python -m bench --completo -o base.json # 720p até A4 600 dpi, 10 até 50k nomes
+    python -m bench -o novo.json --base base.json   # compara e acusa regressões
+    python -m bench --partida               # só o custo de importar o motor (partida a frio)
+
+Modelos e listas de nomes são sintéticos e determinísticos (mesma semente, mesmos
+dados). Cada caso roda num processo novo, para o pico de RSS ser só daquele caso.
+Os ZIPs vão para um contador de bytes, não para o disco.
+"""
+import argparse, io, json, multiprocessing as mp, os, platform, random, sys, time
+
+RESOLUCOES = {
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "A4-150dpi": (1754, 1240),
+    "A4-300dpi": (3508, 2480),
+    "A4-600dpi": (7016, 4961),
+}
+TAMANHOS = (10, 100, 1000, 10000, 50000)
+CAMINHOS = (
+    "app:PDF", "app:PNG", "app:JPEG",
+    "utils:PDF (vetor)", "utils:SVG (vetor)", "utils:EPS (vetor)", "utils:PNG", "utils:JPEG",
+)
+
+_PRIMEIROS = ["Ana", "João", "Maria", "José", "Conceição", "Zoë", "Łukasz", "Søren", "Αλέξανδρος",
+              "Дмитрий", "محمد", "李", "さくら", "Nguyễn", "Björk", "François", "Ígor", "Ñuño"]
+_ULTIMOS = ["Silva", "Souza", "Gonçalves", "Müller", "O'Connor", "Da Costa e Silva", "Ødegård",
+            "Παπαδόπουλος", "Иванова", "الحسن", "王", "山田", "Trần", "Ólafsdóttir", "Šimůnek"]
+
+def nomes_sinteticos(n: int, semente: int = 42):
+    rnd = random.Random(semente)
+    for i in range(n):
+        meio = f" {rnd.choice(_ULTIMOS)}" if rnd.random() < 0.4 else ""
+        yield f"{rnd.choice(_PRIMEIROS)}{meio} {rnd.choice(_ULTIMOS)} {i}"
+
+def modelo_sintetico(size):
+    """Gradiente com molduras e blocos de cor (comprime como um certificado real, não como ruído)."""
+    from PIL import Image, ImageDraw
+    W, H = size
+    img = Image.linear_gradient("L").resize((W, H)).convert("RGB")
+    d = ImageDraw.Draw(img)
+    m = max(4, W // 60)
+    d.rectangle((m, m, W - m, H - m), outline="#8a6d1d", width=max(2, W // 300))
+    for k in range(12):
+        x = (k * 977) % W
+        d.rectangle((x, H // 8, x + W // 20, H // 8 + H // 20), fill=(40 * k % 255, 90, 160))
+    d.ellipse((W // 2 - W // 12, H - H // 4, W // 2 + W // 12, H - H // 12), fill="#c9a227")
+    return img
+
+class _Contador(io.RawIOBase):
+    """Destino de ZIP que só conta bytes."""
+    def __init__(self):
+        self.total = 0
+    def writable(self):
+        return True
+    def write(self, b):
+        self.total += len(b)
+        return len(b)
+
+def _executar(caso, fila):
+    import engine, medicao, utils
+    caminho, resolucao, n, opcoes = caso["caminho"], caso["resolucao"], caso["n"], caso["opcoes"]
+    size = RESOLUCOES[resolucao]
+    img = modelo_sintetico(size)
+    nomes = nomes_sinteticos(n)
+    layout = {"x": size[0] // 2, "y": size[1] // 2, "tamanho": max(12, size[1] // 15)}
+    destino = _Contador()
+    t = time.perf_counter()
+    if caminho.startswith("app:"):
+        entradas = engine.gerar_arquivos(img, None, nomes, layout, caminho[4:],
+                                         workers=opcoes["workers"], faixa=opcoes["faixa"], perfil=opcoes["perfil"])
+        arquivos = engine.escrever_zip(entradas, destino, opcoes["perfil"])
+    else:
+        b = io.BytesIO(); img.save(b, format="PNG")
+        meta = {"type": "raster", "raw": b.getvalue()}
+        itens = ((utils._safe_filename(nm), nm, {"dx": 0, "dy": 0, "tamanho": layout["tamanho"]}) for nm in nomes)
+        entradas = utils.iter_exportacao(meta, None, itens, size, layout["x"], layout["y"], 0, 0, "#000000",
+                                         caminho[6:], workers=opcoes["workers"])
+        arquivos = engine.escrever_zip(entradas, destino)
+    dt = time.perf_counter() - t
+    rss = medicao.rss_pico_processo()  # processo novo por caso: o pico é o do caso
+    fila.put({**caso, "segundos": round(dt, 4), "cert_por_s": round(n / dt, 2) if dt else None,
+              "arquivos": arquivos, "bytes_saida": destino.total, "pico_rss": rss})
+
+def rodar_caso(caso):
+    ctx = mp.get_context("spawn")
+    fila = ctx.Queue()
+    p = ctx.Process(target=_executar, args=(caso, fila))
+    p.start()
+    try:
+        return fila.get()
+    finally:
+        p.join()
+
+# Módulos que não podem ser carregados na partida: cada um só entra quando o formato que o usa é escolhido
+PESADOS = ("pandas", "reportlab", "svgwrite", "cairosvg", "numpy")
+
+_PARTIDA = """
+import json, sys, time
+t = time.perf_counter()
+import engine, cache, fontes, medicao, perfis, pool, utils
+dt = time.perf_counter() - t
+rss = medicao.rss_pico_processo() or medicao.rss_atual()
+print(json.dumps({"import_s": round(dt, 4), "pico_rss": rss,
+                  "pesados": [m for m in %r if m in sys.modules]}))
+"""
+
+def medir_partida(repeticoes=5):
+    """Tempo (mediana) e RSS de importar o motor num interpretador novo, e os módulos pesados carregados."""
+    import subprocess
+    raiz = os.path.dirname(os.path.abspath(__file__))
+    runs = [json.loads(subprocess.run([sys.executable, "-c", _PARTIDA % (PESADOS,)], cwd=raiz, check=True,
+                                      capture_output=True, text=True).stdout) for _ in range(repeticoes)]
+    runs.sort(key=lambda r: r["import_s"])
+    return runs[len(runs) // 2]
+
+def chave(r):
+    return f"{r['caminho']}|{r['resolucao']}|{r['n']}"
+
+def comparar(base, atual, tolerancia):
+    """Casos em que cert/s caiu mais que `tolerancia` (fração) em relação à base."""
+    antes = {chave(r): r for r in base["resultados"]}
+    regressoes = []
+    for r in atual["resultados"]:
+        b = antes.get(chave(r))
+        if b and b["cert_por_s"] and r["cert_por_s"] is not None:
+            variacao = r["cert_por_s"] / b["cert_por_s"] - 1
+            if variacao < -tolerancia:
+                regressoes.append((chave(r), b["cert_por_s"], r["cert_por_s"], variacao))
+    return regressoes
+
+def comparar_partida(base, atual, tolerancia):
+    """Regressões da partida: módulo pesado carregado, ou import/RSS maior que a base além da tolerância."""
+    regressoes = [(f"partida|{m}", None, "importado", None) for m in atual["pesados"]]
+    if base:
+        for k in ("import_s", "pico_rss"):
+            variacao = atual[k] / base[k] - 1
+            if variacao > tolerancia:
+                regressoes.append((f"partida|{k}", base[k], atual[k], variacao))
+    return regressoes
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m bench", description=__doc__.split("\n")[0])
+    p.add_argument("--completo", action="store_true", help="Todas as resoluções e tamanhos de lista")
+    p.add_argument("--resolucoes", nargs="+", choices=list(RESOLUCOES))
+    p.add_argument("--tamanhos", nargs="+", type=int)
+    p.add_argument("--caminhos", nargs="+", choices=CAMINHOS)
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--perfil", default=None)
+    p.add_argument("--faixa", action="store_true")
+    p.add_argument("--partida", action="store_true", help="Mede só a partida a frio (import e RSS)")
+    p.add_argument("-o", "--saida", help="Grava os resultados em JSON")
+    p.add_argument("--base", help="JSON de uma execução anterior para comparar")
+    p.add_argument("--tolerancia", type=float, default=0.10, help="Queda de cert/s aceita (fração)")
+    args = p.parse_args(argv)
+
+    resolucoes = args.resolucoes or (list(RESOLUCOES) if args.completo else ["720p", "1080p"])
+    if args.partida:
+        resolucoes = []
+    tamanhos = args.tamanhos or (list(TAMANHOS) if args.completo else [10, 100])
+    caminhos = args.caminhos or list(CAMINHOS)
+    opcoes = {"workers": args.workers, "perfil": args.perfil, "faixa": args.faixa}
+
+    import PIL, reportlab
+    resultado = {
+        "ambiente": {"python": platform.python_version(), "plataforma": platform.platform(),
+                     "cpus": os.cpu_count(), "pillow": PIL.__version__, "reportlab": reportlab.Version},
+        "opcoes": opcoes, "resultados": [],
+    }
+    resultado["partida"] = partida = medir_partida()
+    print(f"partida: import {partida['import_s'] * 1000:.0f} ms, RSS {partida['pico_rss'] / 2**20:.0f} MiB, "
+          f"pesados: {', '.join(partida['pesados']) or 'nenhum'}")
+    if resolucoes:
+        print(f"{'caminho':20} {'resolução':10} {'nomes':>6} {'cert/s':>9} {'RSS MiB':>8} {'saída MiB':>10}")
+    for resolucao in resolucoes:
+        for n in tamanhos:
+            for caminho in caminhos:
+                r = rodar_caso({"caminho": caminho, "resolucao": resolucao, "n": n, "opcoes": opcoes})
+                resultado["resultados"].append(r)
+                print(f"{caminho:20} {resolucao:10} {n:>6} {r['cert_por_s']:>9} "
+                      f"{r['pico_rss'] / 2**20:>8.0f} {r['bytes_saida'] / 2**20:>10.1f}", flush=True)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as fh:
+            json.dump(resultado, fh, ensure_ascii=False, indent=2)
+    if args.base:
+        with open(args.base, encoding="utf-8") as fh:
+            base = json.load(fh)
+        regressoes = comparar(base, resultado, args.tolerancia)
+        for k, antes, agora, v in regressoes:
+            print(f"REGRESSÃO {k}: {antes} -> {agora} cert/s ({v:+.0%})")
+    else:
+        base, regressoes = {}, []
+    # a partida é sempre verificada: módulo pesado na importação é regressão mesmo sem base
+    lentas = comparar_partida(base.get("partida"), partida, max(args.tolerancia, 0.25))
+    for k, antes, agora, v in lentas:
+        print(f"REGRESSÃO {k}: {antes} -> {agora}" + (f" ({v:+.0%})" if v is not None else ""))
+    return 1 if regressoes or lentas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
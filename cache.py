@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""Cache dos modelos (frente/verso) já decodificados, redimensionados e em PNG.
+
+A chave é o hash do conteúdo + tamanho de destino, então o mesmo modelo é
+preparado uma vez só, seja no preview, seja em qualquer exportador.
+As imagens devolvidas são compartilhadas: use .copy() antes de desenhar.
+"""
+import hashlib, io, json, os, threading
+from collections import OrderedDict
+from PIL import Image
+
+import medicao
+
+LIMITE_MB = int(os.environ.get("CERT_CACHE_MB", "512"))
+
+def hash_bytes(raw: bytes) -> str:
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+def hash_partes(*partes) -> str:
+    """Hash de várias entradas (bytes, str, números, dicts/listas JSON, arrays NumPy ou imagens PIL)."""
+    h = hashlib.blake2b(digest_size=16)
+    for p in partes:
+        if p is None:
+            p = b"\0"
+        elif isinstance(p, Image.Image):
+            p = f"{p.mode}{p.size}".encode("ascii") + p.tobytes()
+        elif hasattr(p, "tobytes"):
+            p = p.tobytes()
+        elif not isinstance(p, (bytes, bytearray)):
+            p = json.dumps(p, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+        h.update(len(p).to_bytes(8, "little"))
+        h.update(p)
+    return h.hexdigest()
+
+def _custo(valor) -> int:
+    if isinstance(valor, Image.Image):
+        return valor.width * valor.height * len(valor.getbands())
+    if isinstance(valor, (bytes, bytearray)):
+        return len(valor)
+    return 0
+
+class CacheLRU:
+    """LRU limitado pela memória estimada (pixels das imagens + tamanho dos bytes)."""
+    def __init__(self, limite_bytes: int):
+        self.limite = limite_bytes
+        self.total = 0
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave, construir):
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                return self._itens[chave][0]
+        valor = construir()
+        custo = _custo(valor)
+        with self._lock:
+            if chave not in self._itens and custo <= self.limite:
+                self._itens[chave] = (valor, custo)
+                self.total += custo
+                while self.total > self.limite:
+                    _, (_, c) = self._itens.popitem(last=False)
+                    self.total -= c
+        return valor
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self.total = 0
+
+_CACHE = CacheLRU(LIMITE_MB * 1024 * 1024)
+
+def obter(chave, construir):
+    return _CACHE.obter(chave, construir)
+
+# filtros de redimensionamento (nome -> Image.Resampling); None = o padrão do PIL
+FILTROS = {"lanczos": "LANCZOS", "bicubico": "BICUBIC", "bilinear": "BILINEAR", "area": "BOX", "vizinho": "NEAREST"}
+
+def filtro_pil(filtro):
+    """Image.Resampling do nome em FILTROS (None = padrão do PIL)."""
+    return getattr(Image.Resampling, FILTROS[filtro]) if filtro else None
+
+def redimensionar(img, size, filtro=None):
+    size = tuple(size)
+    if img.size == size:
+        return img
+    return img.resize(size) if filtro is None else img.resize(size, filtro_pil(filtro))
+
+def imagem(raw: bytes, size=None, filtro=None) -> Image.Image:
+    """Imagem RGB decodificada de raw (redimensionada para size=(W,H), se dado, com o filtro de FILTROS).
+       Reduzindo um JPEG, o decodificador já entrega a imagem em 1/2, 1/4 ou 1/8 (modo draft)."""
+    h = hash_bytes(raw)
+    def construir():
+        with medicao.etapa("modelo"):
+            img = Image.open(io.BytesIO(raw))
+            if size is not None and img.format == "JPEG" and size[0] < img.width and size[1] < img.height:
+                img.draft("RGB", tuple(size))  # menor escala do DCT que ainda é >= size
+            img = img.convert("RGB")
+            if size is not None:
+                img = redimensionar(img, size, filtro)
+            return img
+    return obter((h, "img", tuple(size) if size else None, filtro), construir)
+
+def png(raw: bytes, size=None, filtro=None) -> bytes:
+    """A mesma imagem de imagem(raw, size, filtro) codificada em PNG."""
+    h = hash_bytes(raw)
+    def construir():
+        img = imagem(raw, size, filtro)
+        with medicao.etapa("modelo"):
+            b = io.BytesIO(); img.save(b, format="PNG")
+            return b.getvalue()
+    return obter((h, "png", tuple(size) if size else None, filtro), construir)
+
+def proxy(raw: bytes, largura: int) -> Image.Image:
+    """Versão reduzida (largura máx. em px, mesma proporção) para previews."""
+    full = imagem(raw)
+    if full.width <= largura:
+        return full
+    return imagem(raw, (largura, max(1, round(full.height * largura / full.width))))
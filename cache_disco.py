@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""Cache em disco dos certificados já gerados, para reexportações incrementais.
+
+A chave de cada certificado é o hash de tudo que muda o arquivo final (modelo,
+verso, fonte, nome, posição, tamanho, cor, alinhamento, formato e perfil de
+codificação). Ao gerar de novo depois de corrigir alguns nomes, só esses são
+renderizados; o resto vem do disco com os mesmos bytes.
+
+    disco = cache_disco.padrao()     # None se desligado (CERT_CACHE_DISCO_MB=0)
+    for item, entradas in cache_disco.reaproveitar(itens, chave_de, gerar, disco): ...
+
+Os arquivos mais antigos (pelo último uso) saem quando o total passa do limite,
+e os não usados há mais de CERT_CACHE_DISCO_DIAS dias saem na primeira consulta.
+"""
+import json, os, tempfile, threading, time
+from collections import deque
+
+import medicao
+
+PASTA = os.environ.get("CERT_CACHE_DISCO_DIR", os.path.join(tempfile.gettempdir(), "certificados_cache"))
+LIMITE_MB = int(os.environ.get("CERT_CACHE_DISCO_MB", "2048"))
+IDADE_DIAS = float(os.environ.get("CERT_CACHE_DISCO_DIAS", "30"))
+# mude quando a renderização mudar de um jeito que as entradas não capturam (invalida o cache)
+VERSAO = 5
+
+class CacheDisco:
+    """Um arquivo por certificado: cabeçalho JSON [[nome_arquivo, tamanho], ...] + os bytes."""
+    def __init__(self, pasta=PASTA, limite_bytes=LIMITE_MB * 1024 * 1024, idade_s=IDADE_DIAS * 86400):
+        self.pasta = pasta
+        self.limite = limite_bytes
+        self.idade = idade_s
+        self.total = None  # medido na primeira gravação (varre a pasta)
+        self._lock = threading.Lock()
+
+    def _caminho(self, chave):
+        return os.path.join(self.pasta, chave[:2], chave)
+
+    def tem(self, chave) -> bool:
+        """Se está no cache (e marca como usado agora, para não sair na próxima poda)."""
+        try:
+            os.utime(self._caminho(chave))
+            return True
+        except OSError:
+            return False
+
+    def obter(self, chave):
+        """[(nome_arquivo, bytes)] ou None."""
+        try:
+            with open(self._caminho(chave), "rb") as fh:
+                cab = json.loads(fh.readline())
+                return [(nome, fh.read(n)) for nome, n in cab]
+        except (OSError, ValueError):
+            return None
+
+    def gravar(self, chave, entradas):
+        caminho = self._caminho(chave)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        # o SVG sai como str do svgwrite; no ZIP o conteúdo é o mesmo em UTF-8
+        entradas = [(nome, dados.encode("utf-8") if isinstance(dados, str) else dados) for nome, dados in entradas]
+        cab = json.dumps([[nome, len(dados)] for nome, dados in entradas], ensure_ascii=False).encode("utf-8")
+        tmp = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(cab + b"\n")
+            for _, dados in entradas:
+                fh.write(dados)
+            tamanho = fh.tell()
+        os.replace(tmp, caminho)  # leitores nunca veem um arquivo pela metade
+        with self._lock:
+            if self.total is None:
+                self.total = self.podar()
+            else:
+                self.total += tamanho
+            if self.total > self.limite:
+                self.total = self.podar()
+
+    def podar(self) -> int:
+        """Apaga os vencidos e, se passar do limite, os menos usados até 90% dele. Devolve o total."""
+        arquivos = []
+        for raiz, _, nomes in os.walk(self.pasta):
+            for nome in nomes:
+                caminho = os.path.join(raiz, nome)
+                try:
+                    st = os.stat(caminho)
+                except OSError:
+                    continue
+                if nome.endswith(".tmp") and st.st_mtime > time.time() - 3600:
+                    continue  # gravação em andamento
+                arquivos.append((st.st_mtime, st.st_size, caminho))
+        arquivos.sort()
+        vencimento = time.time() - self.idade
+        total = sum(t for _, t, _ in arquivos)
+        alvo = self.limite * 0.9
+        for mtime, tamanho, caminho in arquivos:
+            if mtime >= vencimento and total <= alvo:
+                break
+            try:
+                os.remove(caminho)
+                total -= tamanho
+            except OSError:
+                pass
+        return total
+
+    def limpar(self):
+        import shutil
+        shutil.rmtree(self.pasta, ignore_errors=True)
+        with self._lock:
+            self.total = 0
+
+_PADRAO = None
+
+def padrao():
+    """O cache configurado pelas variáveis de ambiente (None se CERT_CACHE_DISCO_MB=0)."""
+    global _PADRAO
+    if LIMITE_MB <= 0:
+        return None
+    if _PADRAO is None:
+        _PADRAO = CacheDisco()
+    return _PADRAO
+
+def reaproveitar(itens, chave_de, gerar, disco):
+    """(item, [(nome_arquivo, bytes)]) para cada item, na ordem (disco=None: só gera).
+
+    chave_de(item) -> chave; gerar(itens) -> resultados na mesma ordem (pode ser um pool).
+    Só os itens que não estão no disco vão para gerar; os resultados novos são gravados.
+    Os que vêm do cache são lidos na hora de sair (a memória não cresce com os acertos)."""
+    ordem = deque()  # (item, chave, está no disco)
+    def faltam():
+        for item in itens:
+            k = chave_de(item) if disco is not None else None
+            salvo = k is not None and disco.tem(k)
+            ordem.append((item, k, salvo))
+            if not salvo:
+                yield item
+    def acertos():
+        while ordem and ordem[0][2]:
+            item, k, _ = ordem.popleft()
+            with medicao.etapa("cache"):
+                r = disco.obter(k)
+            if r is None:  # removido entre a consulta e a leitura
+                r = next(iter(gerar(iter([item]))))
+                disco.gravar(k, r)
+            yield item, r
+    for r in gerar(faltam()):
+        yield from acertos()
+        item, k, _ = ordem.popleft()
+        if k is not None:
+            disco.gravar(k, r)
+        yield item, r
+    yield from acertos()
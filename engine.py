@@ -0,0 +1,534 @@
+# -*- coding: utf-8 -*-
+"""Motor de geração de certificados sem Streamlit.
+
+Usado pelo app.py e pela linha de comando (lotes noturnos):
+
+    python -m engine --frente frente.png --verso verso.png --nomes nomes.csv \
+        --fonte Bentosa.ttf --layout layout.json --formato PNG --saida certificados.zip --workers 8
+
+O layout.json aceita as mesmas opções da barra lateral do app:
+    {"x": 1000, "y": 600, "alinhamento": "Centro", "escala": 1.0, "tamanho": 48,
+     "cor": "#000000", "padrao_nome": "{name}",
+     "ajustes": {"Maria Silva": {"dx": 0, "dy": 10, "tamanho": 40}}}
+"""
+import argparse, io, json, os, sys, zipfile
+from itertools import islice
+from PIL import Image, ImageDraw
+
+import cache
+import cache_disco
+import fontes
+import medicao
+import nomes
+import perfis
+import pool
+import utils
+
+# PDF/PNG/JPEG seguem o laço do app.py; os "(vetor)" usam os exportadores do utils.py.
+# Os "(único)" juntam a lista toda num PDF multipágina (fundo embutido uma vez só).
+FORMATOS = ("PDF", "PNG", "JPEG", "PDF (único)",
+            "PDF (vetor)", "SVG (vetor)", "SVG (vetor, compartilhado)", "EPS (vetor)", "PDF (vetor, único)")
+
+LAYOUT_PADRAO = {
+    "x": 1000, "y": 600, "alinhamento": "Centro", "escala": 1.0, "tamanho": 48,
+    "cor": "#000000", "padrao_nome": "{name}", "ajustes": {},
+}
+
+# --------------------------
+# Helpers (compartilhados com o app.py)
+# --------------------------
+def load_font(font_file, size):
+    """Fonte do registro compartilhado (bytes, caminho, arquivo enviado ou None = Bentosa)."""
+    if font_file is not None and not isinstance(font_file, (bytes, str, os.PathLike)):
+        font_file = font_file.getvalue()
+    return fontes.pil(font_file, size)
+
+ANCORAS = {"Esquerda":"la", "Centro":"mm", "Direita":"ra"}
+
+def draw_name_on_image(img: Image.Image, name: str, x: int, y: int, font, color, align: str):
+    with medicao.etapa("desenhar"):
+        im = img.copy()
+        draw = ImageDraw.Draw(im)
+        anchor = ANCORAS.get(align, "mm")
+        draw.text((x, y), name, fill=color, font=font, anchor=anchor)
+        return im
+
+def pil_list_to_pdf_original(images, dpi=None):
+    '''Gera PDF multipágina usando o TAMANHO ORIGINAL de cada imagem.
+       dpi: a página fica com px * 72 / dpi pontos (None = 1 px por ponto).'''
+    if not images:
+        return b""
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.utils import ImageReader
+    buf = io.BytesIO()
+    # Canvas inicial com o tamanho da primeira imagem
+    pt = 72 / dpi if dpi else 1  # sem dpi, pixels tratados como points (sem margens)
+    first = images[0].convert("RGB")
+    w0, h0 = first.width * pt, first.height * pt
+    c = canvas.Canvas(buf, pagesize=(w0, h0))
+    def draw_page(img):
+        im = img.convert("RGB")
+        w, h = im.width * pt, im.height * pt
+        c.setPageSize((w, h))
+        c.drawImage(ImageReader(im), 0, 0, width=w, height=h)
+        c.showPage()
+    with medicao.etapa("codificar"):
+        for im in images:
+            draw_page(im)
+        c.save()
+    buf.seek(0)
+    return buf.read()
+
+def iter_names(file, coluna=None, deduplicar=True):
+    """Gera os nomes aos poucos (ver nomes.iter_nomes): .txt, .csv ou .xlsx, caminho ou arquivo
+       aberto/enviado. coluna: cabeçalho ou índice (padrão: "Nome"/"Name", senão a 1ª)."""
+    return nomes.iter_nomes(file, coluna=coluna, deduplicar=deduplicar)
+
+def read_names(file, coluna=None, deduplicar=True):
+    return list(iter_names(file, coluna, deduplicar))
+
+def ler_resolucoes(texto):
+    """"original, 1200, 3508@300" -> [(None, None), (1200, None), (3508, 300)]: largura em px
+       (None = a do modelo) e dpi gravado no arquivo (None = nenhum). Vazio -> None (só o original)."""
+    resolucoes = []
+    for parte in texto.replace(";", ",").split(","):
+        parte = parte.strip().lower()
+        if not parte:
+            continue
+        largura, _, dpi = parte.partition("@")
+        largura = largura.strip().removesuffix("px").strip()
+        r = (None if largura in ("", "original") else int(largura), int(dpi.removesuffix("dpi")) if dpi else None)
+        if (r[0] is not None and r[0] <= 0) or (r[1] is not None and r[1] <= 0):
+            raise ValueError(f"resolução inválida: {parte!r}")
+        if r not in resolucoes:
+            resolucoes.append(r)
+    return resolucoes or None
+
+# --------------------------
+# Pipeline
+# --------------------------
+def _ajuste(layout, nome):
+    a = layout.get("ajustes", {}).get(nome, {})
+    return a.get("dx", 0), a.get("dy", 0), a.get("tamanho", layout["tamanho"])
+
+def gerar_arquivos(front_img, back_img, names, layout, formato, fonte=None, ajustes=None, workers=1,
+                   paginas_por_arquivo=0, faixa=False, perfil=None, caixa=None, disco=None,
+                   resolucoes=None, filtro=None):
+    """Gera (nome_arquivo, bytes) para cada nome, um de cada vez.
+
+    front_img/back_img: PIL.Image (back_img pode ser None).
+    fonte: bytes de um TTF (None usa a Bentosa).
+    ajustes: função (i, nome) -> (dx, dy, tamanho); padrão lê layout["ajustes"] por nome.
+    workers: > 1 renderiza/codifica em vários processos (ordem de saída preservada).
+    paginas_por_arquivo: nos formatos "(único)", divide o PDF em partes de N páginas (0 = um arquivo).
+    faixa: em PNG/JPEG, codifica o modelo uma vez e recodifica só a faixa do nome (mesmos pixels).
+    perfil: perfil de codificação (ver perfis.PERFIS); None = "original".
+    caixa: (largura, altura ou None) em px do modelo; nomes que não cabem têm o tamanho reduzido.
+    disco: cache_disco.CacheDisco para reaproveitar certificados já gerados (formatos individuais).
+    resolucoes: em PDF/PNG/JPEG, [(largura_px ou None, dpi ou None), ...] (ver ler_resolucoes); cada nome
+        sai em todas, numa passada só. Com mais de uma, os arquivos levam o sufixo _<largura>px/_<dpi>dpi.
+    filtro: redimensionamento do modelo para as outras larguras (ver cache.FILTROS; None = o do PIL).
+    """
+    if formato not in ("PDF (único)", "PDF (vetor, único)"):
+        usados = set()
+        if formato == "SVG (vetor, compartilhado)":
+            names = utils._anotar_chars(names, usados, nome=lambda nm: nm)
+        for _, entradas in gerar_por_nome(front_img, back_img, names, layout, formato, fonte, ajustes, workers,
+                                          faixa=faixa, perfil=perfil, caixa=caixa, disco=disco,
+                                          resolucoes=resolucoes, filtro=filtro):
+            yield from entradas
+        if formato == "SVG (vetor, compartilhado)":
+            yield from utils.recursos_svg(_meta(front_img), front_img.size, usados, fonte)
+        return
+    layout = {**LAYOUT_PADRAO, **layout}
+    tarefas = _tarefas(names, layout, ajustes, fonte, caixa)
+    if formato == "PDF (único)":
+        yield from _gerar_pdf_unico(front_img, back_img, tarefas, layout, fonte, paginas_por_arquivo)
+        return
+    if formato == "PDF (vetor, único)":
+        y_vetor, ajuste_vetor = _y_vetor(front_img.size[1], layout, formato, fonte)
+        itens = ((utils._safe_filename(layout["padrao_nome"].format(name=nm)), nm, ajuste_vetor(dx, dy, sz))
+                 for _, nm, dx, dy, sz in tarefas)
+        verso_meta = _meta(back_img) if back_img is not None else None
+        yield from utils.iter_exportacao(_meta(front_img), verso_meta, itens, front_img.size, layout["x"], y_vetor,
+                                         0, 0, layout["cor"], formato, paginas_por_arquivo=paginas_por_arquivo,
+                                         fonte=fonte)
+
+def _tarefas(names, layout, ajustes, fonte, caixa, pular=()):
+    if ajustes is None:
+        ajustes = lambda i, nm: _ajuste(layout, nm)
+    tarefas = ((i, nm, *ajustes(i, nm)) for i, nm in enumerate(names) if i not in pular)
+    if caixa is not None:
+        tarefas = _encaixar(tarefas, caixa, layout["escala"], fonte)
+    return tarefas
+
+def gerar_por_nome(front_img, back_img, names, layout, formato, fonte=None, ajustes=None, workers=1,
+                   faixa=False, perfil=None, caixa=None, pular=(), disco=None, resolucoes=None, filtro=None):
+    """Como gerar_arquivos nos formatos individuais, mas agrupado por pessoa: (i, [(nome_arquivo, bytes)]).
+       pular: índices da lista que não precisam ser gerados (já prontos de uma execução anterior).
+       disco: cache_disco.CacheDisco; quem já foi gerado com as mesmas entradas vem dele."""
+    layout = {**LAYOUT_PADRAO, **layout}
+    tarefas = _tarefas(names, layout, ajustes, fonte, caixa, pular)
+    layout_lote = {k: v for k, v in layout.items() if k != "ajustes"}
+    base = None
+    if disco is not None:
+        base = cache.hash_partes(cache_disco.VERSAO, "engine", front_img, back_img, fontes.registrar(fonte),
+                                 layout_lote, formato, faixa, perfil, resolucoes, filtro)
+    # o verso não muda: em PNG/JPEG é codificado uma vez aqui e reaproveitado em todos os certificados
+    # (com várias resoluções, uma vez por resolução, no _renderizador)
+    verso_cod = None
+    if back_img is not None and formato in ("PNG", "JPEG") and not resolucoes:
+        verso_cod = perfis.codificar(back_img, formato, perfil)
+        back_img = None
+    args = (front_img, back_img, layout_lote, formato, fonte, faixa, perfil, verso_cod, resolucoes, filtro)
+    def gerar(tarefas):
+        if workers > 1:
+            return pool.mapear(_renderizador, args, tarefas, workers)
+        render = _renderizador(*args)
+        return (medicao.chamar(render, *t) for t in tarefas)
+    chave_de = lambda t: cache.hash_partes(base, t[1:])
+    for t, entradas in cache_disco.reaproveitar(tarefas, chave_de, gerar, disco):
+        yield t[0], entradas
+
+def produtor(front_img, back_img, names, layout, formato, paginas_por_arquivo=0, **opcoes):
+    """(produzir, total) para trabalhos.Trabalho. Nos formatos individuais a unidade é a pessoa
+       e a retomada pula quem já foi gerado; nos "(único)" a unidade é o arquivo, e o PDF é
+       refeito do começo (não dá para continuar um PDF pela metade)."""
+    names = list(names)
+    if formato == "SVG (vetor, compartilhado)":
+        # os recursos (fundo e fonte com os caracteres da lista toda) são a última unidade
+        def produzir(pular):
+            yield from gerar_por_nome(front_img, back_img, names, layout, formato, pular=pular, **opcoes)
+            if len(names) not in pular:
+                yield len(names), list(utils.recursos_svg(_meta(front_img), front_img.size, set("".join(names)),
+                                                          opcoes.get("fonte")))
+        return produzir, len(names) + 1
+    if formato not in ("PDF (único)", "PDF (vetor, único)"):
+        return (lambda pular: gerar_por_nome(front_img, back_img, names, layout, formato, pular=pular, **opcoes)), len(names)
+    total = -(-len(names) // paginas_por_arquivo) if paginas_por_arquivo else 1
+    def produzir(pular):
+        entradas = gerar_arquivos(front_img, back_img, names, layout, formato,
+                                  paginas_por_arquivo=paginas_por_arquivo, **opcoes)
+        return ((k, [e]) for k, e in enumerate(entradas))
+    return produzir, total
+
+def _encaixar(tarefas, caixa, escala, fonte, lote=1000):
+    """Reduz o tamanho de cada tarefa para o nome caber na caixa, medindo a lista em lotes."""
+    import autoajuste
+    largura, altura = caixa
+    while True:
+        bloco = list(islice(tarefas, lote))
+        if not bloco:
+            return
+        teto = [max(1, int(sz * escala)) for _, _, _, _, sz in bloco]
+        px = autoajuste.tamanhos(fonte, [nm for _, nm, _, _, _ in bloco], largura, altura, minimo=1, maximo=teto)
+        for (i, nm, dx, dy, sz), p, t in zip(bloco, px, teto):
+            yield i, nm, dx, dy, (sz if p >= t else max(1, int(p / escala)))
+
+def _renderizador(front_img, back_img, layout, formato, fonte, faixa=False, perfil=None, verso_cod=None,
+                  resolucoes=None, filtro=None, dpi=None):
+    """Prepara o que é comum ao lote e devolve render(i, nome, dx, dy, tamanho) -> [(nome_arquivo, bytes)].
+       verso_cod: verso já codificado (PNG/JPEG), repetido como está em todo certificado.
+       resolucoes/filtro: ver gerar_arquivos; dpi: o de uma resolução só (metadados / tamanho da página)."""
+    g_x, g_y = layout["x"], layout["y"]
+    g_scale, g_align, color = layout["escala"], layout["alinhamento"], layout["cor"]
+    tpl = layout["padrao_nome"]
+
+    if formato not in ("PDF", "PNG", "JPEG"):
+        return _renderizador_vetor(front_img, back_img, layout, formato, fonte)
+    if resolucoes:
+        return _renderizador_resolucoes(front_img, back_img, layout, formato, fonte, faixa, perfil, resolucoes, filtro)
+
+    # Modo faixa: modelo já codificado, só a faixa do nome é recodificada por pessoa
+    modelo = None
+    if faixa:
+        import patch  # numpy só é preciso no modo faixa
+    with medicao.etapa("modelo"):
+        if faixa and formato == "PNG":
+            modelo = patch.ModeloPNG(front_img, nivel=perfis.nivel_png(perfil), dpi=dpi)
+        elif faixa and formato == "JPEG":
+            modelo = patch.ModeloJPEG(front_img, **perfis.opcoes(perfil, "JPEG"), **({"dpi": (dpi, dpi)} if dpi else {}))
+            if not modelo.ativo:
+                modelo = None
+    ext = {"PNG": "png", "JPEG": "jpg"}.get(formato)
+
+    def render(i, nm, dx, dy, sz):
+        font = load_font(fonte, int(sz * g_scale))
+        fname_base = tpl.format(name=nm)
+
+        if modelo is not None:
+            data = patch.desenhar_na_faixa(modelo, nm, int(g_x + dx), int(g_y + dy), font, color, ANCORAS.get(g_align, "mm"))
+            files = [(f"{fname_base}.{ext}", data)]
+        else:
+            out_img = draw_name_on_image(front_img, nm, int(g_x + dx), int(g_y + dy), font, color, g_align)
+            if formato == "PDF":
+                # PDF: frente + verso no MESMO arquivo, no tamanho ORIGINAL das imagens
+                pages = [out_img]
+                if back_img is not None:
+                    pages.append(back_img)
+                return [(f"{fname_base}.pdf", pil_list_to_pdf_original(pages, dpi))]
+            files = [(f"{fname_base}.{ext}", perfis.codificar(out_img, formato, perfil, dpi))]
+        if verso_cod is not None:
+            files.append((f"{fname_base}_verso.{ext}", verso_cod))
+        return files
+    return render
+
+def _renderizador_resolucoes(front_img, back_img, layout, formato, fonte, faixa, perfil, resolucoes, filtro):
+    """Um _renderizador por resolução: o modelo (e o verso) é redimensionado uma vez só, e posição e
+       tamanho do nome são escalados, então o nome é desenhado direto na resolução final."""
+    variantes = []
+    for largura, dpi in resolucoes:
+        s = largura / front_img.width if largura else 1.0
+        with medicao.etapa("modelo"):
+            frente = cache.redimensionar(front_img, _escalado(front_img.size, s), filtro)
+            verso = cache.redimensionar(back_img, _escalado(back_img.size, s), filtro) if back_img is not None else None
+        lay = {**layout, "x": layout["x"] * s, "y": layout["y"] * s, "escala": layout["escala"] * s}
+        if len(resolucoes) > 1:
+            lay["padrao_nome"] = layout["padrao_nome"] + (f"_{largura}px" if largura else "") + (f"_{dpi}dpi" if dpi else "")
+        verso_cod = None
+        if verso is not None and formato in ("PNG", "JPEG"):
+            verso_cod, verso = perfis.codificar(verso, formato, perfil, dpi), None
+        variantes.append((s, _renderizador(frente, verso, lay, formato, fonte, faixa, perfil, verso_cod, dpi=dpi)))
+    def render(i, nm, dx, dy, sz):
+        return [f for s, r in variantes for f in r(i, nm, dx * s, dy * s, sz)]
+    return render
+
+def _escalado(size, s):
+    return max(1, round(size[0] * s)), max(1, round(size[1] * s))
+
+def _gerar_pdf_unico(front_img, back_img, tarefas, layout, fonte, paginas_por_arquivo):
+    """PDF único com a frente/verso do app.py: o nome vira texto vetorial na fonte escolhida,
+       posicionado com a mesma âncora (la/mm/ra) do draw_name_on_image."""
+    from reportlab.lib.colors import HexColor
+    font_name = fontes.reportlab(fonte)
+    W, H = front_img.size
+    g_x, g_y, g_scale, g_align = layout["x"], layout["y"], layout["escala"], layout["alinhamento"]
+
+    def texto(nm, dx, dy, sz):
+        size = int(sz * g_scale)
+        x, y = int(g_x + dx), int(g_y + dy)
+        # imagem (y para baixo, âncora no topo/meio) -> PDF (y para cima, na linha de base)
+        base = y + _ate_base(fonte, size, g_align)
+        def desenhar(c):
+            c.setFont(font_name, size)
+            c.setFillColor(HexColor(layout["cor"]))
+            if g_align == "Esquerda":
+                c.drawString(x, H - base, nm)
+            elif g_align == "Direita":
+                c.drawRightString(x, H - base, nm)
+            else:
+                c.drawCentredString(x, H - base, nm)
+        return desenhar
+
+    textos = (texto(nm, dx, dy, sz) for _, nm, dx, dy, sz in tarefas)
+    verso_size = back_img.size if back_img is not None else None
+    yield from utils.iter_pdf_unico(front_img, back_img, (W, H), textos,
+                                    paginas_por_arquivo=paginas_por_arquivo, verso_size=verso_size)
+
+def _ate_base(fonte, size, align):
+    """Distância (px, para baixo) do y do layout até a linha de base do nome, pela âncora do
+       draw_name_on_image (topo em Esquerda/Direita, meio em Centro), com as métricas do PIL."""
+    asc, desc = load_font(fonte, size).getmetrics()
+    return asc if align in ("Esquerda", "Direita") else (asc - desc) / 2
+
+def _y_vetor(H, layout, formato, fonte):
+    """(y_ancora, ajuste(dx, dy, tamanho) -> {"dx","dy","tamanho"}) para os exportadores do utils.py.
+
+    Eles desenham o texto com y na linha de base: o SVG com y para baixo, como o layout; o PDF e o
+    EPS com y para cima. O y vai para a linha de base como no _gerar_pdf_unico e, no PDF/EPS, é
+    invertido (H - y), para o nome ficar na mesma altura em todos os formatos; o x vira o início
+    (Esquerda) ou o fim (Direita) do nome pela "ancora" do ajuste, como no PNG."""
+    para_cima = formato in ("PDF (vetor)", "PDF (vetor, único)", "EPS (vetor)")
+    ancora = {"Esquerda": "start", "Direita": "end"}.get(layout["alinhamento"], "middle")
+    def ajuste(dx, dy, sz):
+        size = int(sz * layout["escala"])
+        dy = dy + _ate_base(fonte, size, layout["alinhamento"])
+        return {"dx": dx, "dy": -dy if para_cima else dy, "tamanho": size, "ancora": ancora}
+    return (H - layout["y"] if para_cima else layout["y"]), ajuste
+
+def _meta(img):
+    b = io.BytesIO(); img.save(b, format="PNG")
+    return {"type": "raster", "raw": b.getvalue()}
+
+def _renderizador_vetor(front_img, back_img, layout, formato, fonte=None):
+    """Formatos do utils.py (tamanho em pt, na fonte do trabalho)."""
+    tpl = layout["padrao_nome"]
+    verso_meta = _meta(back_img) if back_img is not None else None
+    y_vetor, ajuste = _y_vetor(front_img.size[1], layout, formato, fonte)
+    render_utils = utils.renderizador_exportacao(_meta(front_img), verso_meta, front_img.size,
+                                                 layout["x"], y_vetor, 0, 0, layout["cor"], formato, fonte=fonte)
+    def render(i, nm, dx, dy, sz):
+        arquivo = utils._safe_filename(tpl.format(name=nm))
+        return [render_utils(arquivo, nm, ajuste(dx, dy, sz))]
+    return render
+
+def escrever_zip(entradas, destino, perfil=None):
+    """Grava as entradas no ZIP (caminho ou arquivo) assim que ficam prontas. Retorna a quantidade.
+       A compressão de cada arquivo segue o perfil, pela extensão."""
+    n = 0
+    with zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_DEFLATED) as z:
+        for fname, fbytes in entradas:
+            tipo, nivel = perfis.zip_para(perfil, fname)
+            with medicao.etapa("zip"):
+                z.writestr(fname, fbytes, compress_type=tipo, compresslevel=nivel)
+            n += 1
+    return n
+
+def amostra(front_img, names, layout, fonte=None, ajustes=None):
+    """Frente do primeiro certificado da lista (PIL), para comparar perfis."""
+    layout = {**LAYOUT_PADRAO, **layout}
+    nm = next(iter(names), "nome da pessoa")
+    dx, dy, sz = ajustes(0, nm) if ajustes else _ajuste(layout, nm)
+    font = load_font(fonte, int(sz * layout["escala"]))
+    return draw_name_on_image(front_img, nm, int(layout["x"] + dx), int(layout["y"] + dy),
+                              font, layout["cor"], layout["alinhamento"])
+
+def abrir_imagem(path):
+    if path is None:
+        return None
+    return Image.open(path).convert("RGB")
+
+# --------------------------
+# CLI
+# --------------------------
+def _gerar_com_checkpoint(args, front_img, back_img, coluna, layout, fonte, caixa, disco, medidor, resolucoes=None):
+    """Gera pelo trabalhos.Trabalho, com progresso no stderr. Ctrl+C para depois do certificado
+       atual e mantém o checkpoint. Retorna a quantidade de arquivos (None se interrompido)."""
+    import shutil
+    import trabalhos
+    names = read_names(args.nomes, coluna, not args.manter_repetidos)
+    with open(args.frente, "rb") as fh:
+        frente = fh.read()
+    verso = None
+    if args.verso:
+        with open(args.verso, "rb") as fh:
+            verso = fh.read()
+    chave = trabalhos.chave(frente, verso, names, layout, args.formato, fonte, caixa, args.perfil,
+                            args.faixa, args.paginas_por_arquivo, resolucoes, args.filtro)
+    produzir, total = produtor(front_img, back_img, names, layout, args.formato,
+                               paginas_por_arquivo=args.paginas_por_arquivo, fonte=fonte,
+                               workers=args.workers or pool.workers_padrao(), faixa=args.faixa,
+                               perfil=args.perfil, caixa=caixa, disco=disco, resolucoes=resolucoes, filtro=args.filtro)
+    t = trabalhos.Trabalho(chave, produzir, total, args.perfil, os.path.join(args.checkpoint, chave), medidor)
+    t.iniciar()
+    try:
+        while t.situacao == "rodando":
+            t.esperar(1)
+            e = t.estado()
+            eta = f", faltam ~{e['eta_s']:.0f} s" if e["eta_s"] is not None else ""
+            print(f"\r{e['feitos']}/{e['total']}{eta}   ", end="", file=sys.stderr, flush=True)
+    except KeyboardInterrupt:
+        t.cancelar()
+        t.esperar()
+    print(file=sys.stderr)
+    if t.situacao == "erro":
+        raise SystemExit(t.erro)
+    if t.situacao != "concluido":
+        print(f"interrompido em {t.feitos}/{total}; rode de novo para continuar", file=sys.stderr)
+        return None
+    if t.retomados:
+        print(f"{t.retomados} retomado(s) do checkpoint", file=sys.stderr)
+    shutil.copyfile(t.zip, args.saida)
+    with zipfile.ZipFile(args.saida) as z:
+        return len(z.namelist())
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m engine", description="Gera certificados em lote (sem Streamlit).")
+    p.add_argument("--frente", required=True, help="Imagem da frente (PNG/JPEG)")
+    p.add_argument("--verso", help="Imagem do verso (opcional)")
+    p.add_argument("--nomes", required=True, help="Lista de nomes (.txt, .csv ou .xlsx)")
+    p.add_argument("--coluna", help="Coluna dos nomes no CSV/XLSX: cabeçalho ou índice (padrão: \"Nome\", senão a 1ª)")
+    p.add_argument("--manter-repetidos", action="store_true", help="Não remove nomes repetidos da lista")
+    p.add_argument("--fonte", help="Fonte TTF (padrão: Bentosa)")
+    p.add_argument("--layout", help="JSON com posição, alinhamento, escala, tamanho, cor e ajustes")
+    p.add_argument("--caixa", help="LARGURA ou LARGURAxALTURA (px do modelo): reduz o tamanho dos nomes que não cabem")
+    p.add_argument("--ajustes", help="Ajustes por nome exportados do app (.csv ou .json); somam-se aos do layout")
+    p.add_argument("--formato", choices=FORMATOS, default="PDF")
+    p.add_argument("--saida", help="Caminho do .zip de saída")
+    p.add_argument("--perfil", choices=list(perfis.PERFIS), default=perfis.PERFIL_PADRAO,
+                   help="Perfil de codificação PNG/JPEG/ZIP")
+    p.add_argument("--comparar-perfis", action="store_true",
+                   help="Só mede tempo e tamanho de cada perfil no 1º certificado (PNG e JPEG)")
+    p.add_argument("--paginas-por-arquivo", type=int, default=0,
+                   help="Nos formatos \"(único)\", divide o PDF a cada N páginas (0 = um arquivo só)")
+    p.add_argument("--resolucao", action="append", metavar="LARGURA[@DPI]",
+                   help="PDF/PNG/JPEG: largura em px (ou \"original\") e dpi de saída; repita para gerar "
+                        "várias resoluções numa passada só (ex.: --resolucao original --resolucao 800)")
+    p.add_argument("--filtro", choices=list(cache.FILTROS), default="lanczos",
+                   help="Filtro para redimensionar o modelo nas outras resoluções")
+    p.add_argument("--faixa", action="store_true",
+                   help="PNG/JPEG: recodifica só a faixa do nome sobre o modelo já codificado")
+    p.add_argument("--workers", type=int, default=1,
+                   help="Processos para renderizar em paralelo (0 = um por núcleo)")
+    p.add_argument("--relatorio", help="Grava o tempo por etapa, latências e pico de memória em JSON")
+    p.add_argument("--sem-cache", action="store_true",
+                   help="Não reaproveita certificados já gerados com as mesmas entradas (cache em disco)")
+    p.add_argument("--checkpoint", metavar="PASTA",
+                   help="Grava cada certificado pronto em PASTA; rodar de novo o mesmo comando continua de onde parou")
+    args = p.parse_args(argv)
+    if not args.saida and not args.comparar_perfis:
+        p.error("informe --saida")
+
+    coluna = int(args.coluna) if args.coluna and args.coluna.isdigit() else args.coluna
+    caixa = None
+    if args.caixa:
+        medidas = [int(v) for v in args.caixa.lower().split("x")]
+        caixa = (medidas[0], medidas[1] if len(medidas) > 1 else None)
+    try:
+        resolucoes = ler_resolucoes(",".join(args.resolucao)) if args.resolucao else None
+    except ValueError as e:
+        p.error(str(e))
+    layout = {}
+    if args.layout:
+        with open(args.layout, encoding="utf-8") as fh:
+            layout = json.load(fh)
+    if args.ajustes:
+        from ajustes import Ajustes
+        aj = Ajustes(); aj.importar(args.ajustes)
+        layout["ajustes"] = {**layout.get("ajustes", {}), **aj.como_dict()}
+    fonte = None
+    if args.fonte:
+        with open(args.fonte, "rb") as fh:
+            fonte = fh.read()
+
+    disco = None if args.sem_cache else cache_disco.padrao()
+    m = medicao.Medidor()
+    with medicao.medir(m), medicao.etapa("modelo"):
+        front_img = abrir_imagem(args.frente)
+    if args.comparar_perfis:
+        img = amostra(front_img, iter_names(args.nomes, coluna), layout, fonte)
+        for formato in ("PNG", "JPEG"):
+            for r in perfis.medir(img, formato):
+                print(f"{formato:5} {r['perfil']:9} {r['ms']:9.1f} ms {r['bytes']:>12,} bytes")
+        return 0
+
+    if args.checkpoint:
+        with medicao.medir(m), medicao.etapa("modelo"):
+            back_img = abrir_imagem(args.verso)
+        n = _gerar_com_checkpoint(args, front_img, back_img, coluna, layout, fonte, caixa, disco, m, resolucoes)
+        if n is None:
+            return 130
+    else:
+        with medicao.medir(m):
+            with medicao.etapa("modelo"):
+                back_img = abrir_imagem(args.verso)
+            entradas = gerar_arquivos(front_img, back_img,
+                                      iter_names(args.nomes, coluna, not args.manter_repetidos),
+                                      layout, args.formato, fonte,
+                                      workers=args.workers or pool.workers_padrao(),
+                                      paginas_por_arquivo=args.paginas_por_arquivo, faixa=args.faixa,
+                                      perfil=args.perfil, caixa=caixa, disco=disco,
+                                      resolucoes=resolucoes, filtro=args.filtro)
+            n = escrever_zip(entradas, args.saida, args.perfil)
+    print(f"{n} arquivo(s) gravado(s) em {args.saida}", file=sys.stderr)
+    r = m.relatorio()
+    print(f"{r['total_s']} s, {r['nomes_por_s']} nomes/s, latência p50/p99 "
+          f"{r['latencia_ms']['p50']}/{r['latencia_ms']['p99']} ms", file=sys.stderr)
+    for nome, e in r["etapas"].items():
+        print(f"  {nome:10} {e['s']:9.3f} s {e['pct']:5}% ({e['chamadas']} chamadas)", file=sys.stderr)
+    if args.relatorio:
+        m.salvar(args.relatorio)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
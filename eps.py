@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""EPS por modelo: o prólogo (fonte e fundo) é montado uma vez por lote e cada
+certificado só acrescenta os operadores do nome.
+
+A fonte TTF vai embutida como Type 42 (o próprio arquivo TrueType dentro do
+PostScript) e o nome é desenhado glifo a glifo com glyphshow, então qualquer
+caractere da fonte funciona. Se o TTF for inválido, usa Helvetica (Latin-1).
+O fundo vai como imagem RGB comprimida (FlateDecode + ASCII85, PostScript nível 3).
+"""
+import base64, io, zlib
+
+import fontes
+import medicao
+
+_LIMITE_STRING = 65534  # strings PostScript têm no máximo 65535 bytes
+
+def _cortes_sfnts(raw: bytes, face) -> list:
+    """Posições onde o TTF pode ser cortado para o /sfnts: início de cada tabela e, dentro da
+       glyf, início de cada glifo (a especificação do Type 42 não permite cortar em outro lugar)."""
+    cortes = {0, len(raw)}
+    for t in face.table.values():
+        cortes.add(t["offset"])
+    glyf = face.table.get("glyf")
+    if glyf is not None and glyf["length"] > _LIMITE_STRING:
+        cortes.update(glyf["offset"] + p for p in face.glyphPos)
+    return sorted(c for c in cortes if c <= len(raw))
+
+def _sfnts(raw: bytes, face) -> str:
+    """Array /sfnts: o TTF em strings hexadecimais de até 64 KiB, cortadas só onde é permitido."""
+    partes, ini, anterior = [], 0, 0
+    for c in _cortes_sfnts(raw, face)[1:]:
+        if c - ini > _LIMITE_STRING and anterior > ini:
+            partes.append(raw[ini:anterior])
+            ini = anterior
+        anterior = c
+    partes.append(raw[ini:])
+    # tabela (fora a glyf) maior que uma string: não tem corte permitido, divide em pedaços pares
+    partes = [p[k:k + _LIMITE_STRING] for p in partes for k in range(0, len(p), _LIMITE_STRING)]
+    # cada string leva um byte 0 a mais (o último byte de cada string é ignorado pelos interpretadores antigos)
+    linhas = []
+    for p in partes:
+        h = (p + b"\0").hex()
+        linhas.append("<" + "\n".join(h[k:k + 128] for k in range(0, len(h), 128)) + ">")
+    return "[\n" + "\n".join(linhas) + "\n]"
+
+def _fonte_type42(face, raw: bytes) -> str:
+    escala = 1000.0  # face.bbox vem em unidades de 1/1000 do em
+    bbox = " ".join(f"{v / escala:.4f}" for v in face.bbox)
+    glifos = "\n".join(f"/g{g} {g} def" for g in range(1, face.numGlyphs))
+    return (
+        f"/CertFonte 12 dict begin\n"
+        f"/FontName /CertFonte def\n/FontType 42 def\n/PaintType 0 def\n"
+        f"/FontMatrix [1 0 0 1 0 0] def\n/FontBBox [{bbox}] def\n"
+        f"/Encoding 256 array 0 1 255 {{1 index exch /.notdef put}} for def\n"
+        f"/CharStrings {face.numGlyphs + 1} dict dup begin\n/.notdef 0 def\n{glifos}\nend def\n"
+        f"/sfnts {_sfnts(raw, face)} def\n"
+        f"currentdict end definefont pop\n"
+    )
+
+_FONTE_HELVETICA = (
+    "/Helvetica findfont dup length dict begin\n"
+    "{1 index /FID ne {def} {pop pop} ifelse} forall\n"
+    "/Encoding ISOLatin1Encoding def\n"
+    "currentdict end /CertFonte exch definefont pop\n"
+)
+
+def _fundo(png: bytes, W, H) -> str:
+    from PIL import Image
+    img = Image.open(io.BytesIO(png)).convert("RGB")
+    if img.size != (W, H):
+        img = img.resize((W, H))
+    dados = base64.a85encode(zlib.compress(img.tobytes(), 6), wrapcol=78, adobe=True).decode("ascii")[2:]  # sem o "<~"
+    dados = dados.replace("\n", "\n ")  # nenhuma linha de dados começa com "%" (comentários DSC)
+    return (
+        f"gsave\n0 0 translate {W} {H} scale\n/DeviceRGB setcolorspace\n"
+        f"<< /ImageType 1 /Width {W} /Height {H} /BitsPerComponent 8 /Decode [0 1 0 1 0 1]\n"
+        f"/ImageMatrix [{W} 0 0 -{H} 0 {H}]\n"
+        f"/DataSource currentfile /ASCII85Decode filter /FlateDecode filter >>\nimage\n"
+        f"{dados}\ngrestore\n"
+    )
+
+def _escapar_ps(texto: str) -> str:
+    b = texto.encode("latin-1", "replace")
+    return "".join(chr(c) if 32 <= c < 127 and c not in b"()\\" else f"\\{c:03o}" for c in b)
+
+class ModeloEPS:
+    """prolog(fonte + fundo) uma vez; codificar(nome, ...) devolve o EPS completo de um certificado."""
+    def __init__(self, W, H, fundo_png=None, fonte=None):
+        self.W, self.H = W, H
+        self.font_name = fontes.reportlab(fonte)
+        self.face = None
+        with medicao.etapa("modelo"):
+            if self.font_name != "Helvetica":
+                from reportlab.pdfbase import pdfmetrics
+                self.face = pdfmetrics.getFont(self.font_name).face
+                definicao = _fonte_type42(self.face, self.face._ttf_data)
+            else:
+                definicao = _FONTE_HELVETICA
+            fundo = _fundo(fundo_png, W, H) if fundo_png is not None else ""
+            self.prolog = (
+                f"%!PS-Adobe-3.0 EPSF-3.0\n%%BoundingBox: 0 0 {W} {H}\n%%LanguageLevel: 3\n"
+                f"%%Creator: gerador de certificados\n%%EndComments\n%%BeginProlog\n{definicao}%%EndProlog\n"
+                f"%%Page: 1 1\n{fundo}"
+            ).encode("latin-1")
+
+    def largura(self, nome, tamanho) -> float:
+        return fontes.largura_pdf(self.font_name, tamanho, nome)
+
+    def _texto(self, nome):
+        if self.face is None:
+            return f"({_escapar_ps(nome)}) show\n"
+        gid = self.face.charToGlyph
+        return " ".join(f"/g{gid[ord(c)]} glyphshow" if gid.get(ord(c)) else "/.notdef glyphshow" for c in nome) + "\n"
+
+    def codificar(self, nome, x, y, tamanho, cor, ancora="middle") -> bytes:
+        """EPS com o nome em (x, y) (origem embaixo, à esquerda); cor como no PIL ("#rrggbb").
+           ancora: x no início ("start"), no meio ("middle") ou no fim ("end") do nome."""
+        from PIL import ImageColor
+        r, g, b = (v / 255 for v in ImageColor.getrgb(cor)[:3])
+        x0 = x - self.largura(nome, tamanho) * {"start": 0, "middle": 0.5, "end": 1}[ancora]
+        texto = (
+            f"gsave\n{r:.4g} {g:.4g} {b:.4g} setrgbcolor\n/CertFonte findfont {tamanho} scalefont setfont\n"
+            f"{x0:.2f} {y:.2f} moveto\n{self._texto(nome)}grestore\nshowpage\n%%Trailer\n%%EOF\n"
+        )
+        return self.prolog + texto.encode("latin-1")
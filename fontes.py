@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Registro de fontes compartilhado pelo preview e pelos exportadores.
+
+Cada fonte (Bentosa, TTF enviado ou caminho) é identificada pelo hash dos
+bytes: o FreeTypeFont do PIL é criado uma vez por (fonte, tamanho), o TTFont
+do ReportLab é registrado uma vez por fonte, e as medidas de texto ficam
+memorizadas por (fonte, tamanho, texto). Ficam em memória as _LIMITE fontes
+usadas mais recentemente.
+"""
+import io, os, threading
+from collections import OrderedDict
+from functools import lru_cache
+from PIL import ImageFont
+
+import cache
+import medicao
+
+FONTE_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Bentosa.ttf")
+
+_LIMITE = 16  # fontes guardadas em memória (as menos usadas saem)
+_BYTES = OrderedDict()  # hash -> bytes do TTF
+_RESOLVIDAS = OrderedDict()  # ("id", id(bytes)) ou ("arquivo", caminho, mtime, tamanho) -> (bytes, hash)
+_LOCK = threading.Lock()
+
+def _ler(path: str) -> bytes:
+    try:
+        with open(path, "rb") as fh:
+            return fh.read()
+    except OSError:
+        return b""
+
+def _lembrar(tabela, chave, valor):
+    tabela[chave] = valor
+    tabela.move_to_end(chave)
+    while len(tabela) > _LIMITE:
+        tabela.popitem(last=False)
+
+def registrar(fonte=None) -> str:
+    """fonte: bytes, caminho ou None (Bentosa). Devolve a chave (hash) da fonte.
+       O hash é calculado uma vez por objeto bytes / arquivo (caminho, mtime, tamanho):
+       chamar a cada nome custa só a consulta."""
+    if fonte is None:
+        fonte = FONTE_PADRAO
+    if isinstance(fonte, (str, os.PathLike)):
+        path = os.fspath(fonte)
+        try:
+            st = os.stat(path)
+            chave = ("arquivo", path, st.st_mtime_ns, st.st_size)
+        except OSError:
+            chave = ("arquivo", path, None, None)
+    elif isinstance(fonte, bytes):
+        chave = ("id", id(fonte))  # o objeto fica guardado na entrada, então o id não é reaproveitado
+    else:
+        fonte, chave = bytes(fonte), None
+    with _LOCK:
+        r = _RESOLVIDAS.get(chave)
+        if r is not None and (chave[0] == "arquivo" or r[0] is fonte):
+            _RESOLVIDAS.move_to_end(chave)
+            raw, h = r
+            _lembrar(_BYTES, h, raw)
+            return h
+    raw = _ler(path) if chave is not None and chave[0] == "arquivo" else fonte
+    h = cache.hash_bytes(raw)
+    with _LOCK:
+        if chave is not None:
+            if chave[0] == "id":
+                # o app lê o TTF enviado de novo a cada execução: só o objeto mais recente fica guardado
+                for velha in [k for k, (_, hk) in _RESOLVIDAS.items() if k[0] == "id" and hk == h]:
+                    del _RESOLVIDAS[velha]
+            _lembrar(_RESOLVIDAS, chave, (raw, h))
+        _lembrar(_BYTES, h, raw)
+    return h
+
+def dados(fonte=None) -> bytes:
+    """Bytes do TTF (os mesmos que registrar() usa; None = Bentosa)."""
+    return _BYTES[registrar(fonte)]
+
+@lru_cache(maxsize=256)
+def _pil(h: str, size: int):
+    with medicao.etapa("fonte"):
+        try:
+            return ImageFont.truetype(io.BytesIO(_BYTES[h]), size)
+        except Exception:
+            return ImageFont.load_default()
+
+def pil(fonte, size: int):
+    """FreeTypeFont da fonte no tamanho dado (load_default se o TTF for inválido)."""
+    return _pil(registrar(fonte), int(size))
+
+@lru_cache(maxsize=64)
+def _reportlab(h: str) -> str:
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    with medicao.etapa("fonte"):
+        try:
+            nome = "Cert-" + h[:12]
+            pdfmetrics.registerFont(TTFont(nome, io.BytesIO(_BYTES[h])))
+            return nome
+        except Exception:
+            return "Helvetica"
+
+def reportlab(fonte=None) -> str:
+    """Nome da fonte registrada no ReportLab (Helvetica se o TTF for inválido)."""
+    return _reportlab(registrar(fonte))
+
+@lru_cache(maxsize=65536)
+def _bbox(h: str, size: int, texto: str, anchor):
+    return _pil(h, size).getbbox(texto, anchor=anchor)
+
+def bbox(fonte, size: int, texto: str, anchor=None):
+    """Igual a ImageDraw.textbbox((0,0), texto, font=pil(fonte, size), anchor=anchor)."""
+    return _bbox(registrar(fonte), int(size), texto, anchor)
+
+@lru_cache(maxsize=65536)
+def largura_pdf(font_name: str, size, texto: str) -> float:
+    from reportlab.pdfbase import pdfmetrics
+    return pdfmetrics.stringWidth(texto, font_name, size)
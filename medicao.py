@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""Medição por etapa da geração (decodificar modelo, fonte, desenhar, codificar, zip).
+
+O código instrumentado só chama `etapa("nome")` / `por_nome(segundos)`; sem um
+medidor ativo isso não faz nada. O medidor ativo é do contexto (thread/tarefa asyncio):
+trabalhos em paralelo e o preview do app não se misturam. Para medir:
+
+    with medicao.medir() as m:
+        engine.escrever_zip(engine.gerar_arquivos(...), destino)
+    m.relatorio()      # dict pronto para JSON
+"""
+import json, os, sys, time
+from contextlib import contextmanager
+from contextvars import ContextVar
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_ATUAL = ContextVar("medidor", default=None)
+
+def rss_pico_processo():
+    """Pico de RSS desde o início do processo, em bytes (None sem o módulo resource).
+       ru_maxrss é KiB no Linux, bytes no macOS."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+_STATM = None  # (pid, fd) de /proc/self/statm, reaberto depois de um fork
+_PAGINA = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def rss_atual():
+    """RSS agora, em bytes: /proc no Linux, psutil se instalado; None se não houver como medir."""
+    global _STATM
+    if _STATM is None or _STATM[0] != os.getpid():
+        try:
+            _STATM = (os.getpid(), os.open("/proc/self/statm", os.O_RDONLY))
+        except OSError:
+            _STATM = (os.getpid(), None)
+    if _STATM[1] is not None:
+        return int(os.pread(_STATM[1], 64, 0).split()[1]) * _PAGINA
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+def _percentil(ordenados, p):
+    if not ordenados:
+        return None
+    k = min(len(ordenados) - 1, max(0, round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[k]
+
+class Medidor:
+    def __init__(self):
+        self.etapas = {}      # nome -> [segundos, chamadas]
+        self.latencias = []   # segundos por nome (frente + verso daquela pessoa)
+        self.pico_workers = 0
+        self.pico = rss_atual()  # maior RSS visto ao fim das etapas desta execução
+        self.inicio = time.perf_counter()
+        self.fim = None
+
+    def amostrar(self):
+        rss = rss_atual()
+        if rss is not None and (self.pico is None or rss > self.pico):
+            self.pico = rss
+
+    def somar(self, nome, segundos, chamadas=1):
+        e = self.etapas.setdefault(nome, [0.0, 0])
+        e[0] += segundos
+        e[1] += chamadas
+
+    def retirar(self):
+        """Devolve e zera o que foi medido (usado pelos processos do pool)."""
+        # o processo do pool só vive durante a geração: o pico dele é o desta execução
+        dados = {"etapas": self.etapas, "latencias": self.latencias, "pico_rss": rss_pico_processo() or self.pico}
+        self.etapas, self.latencias = {}, []
+        return dados
+
+    def juntar(self, dados):
+        for nome, (seg, n) in dados["etapas"].items():
+            self.somar(nome, seg, n)
+        self.latencias.extend(dados["latencias"])
+        self.pico_workers = max(self.pico_workers, dados["pico_rss"] or 0)
+
+    def relatorio(self) -> dict:
+        total = (self.fim or time.perf_counter()) - self.inicio
+        lat = sorted(self.latencias)
+        ms = lambda s: None if s is None else round(s * 1000, 2)
+        return {
+            "total_s": round(total, 4),
+            "nomes": len(lat),
+            "nomes_por_s": round(len(lat) / total, 2) if total else None,
+            "etapas": {nome: {"s": round(seg, 4), "chamadas": n, "pct": round(100 * seg / total, 1) if total else None}
+                       for nome, (seg, n) in sorted(self.etapas.items(), key=lambda kv: -kv[1][0])},
+            "latencia_ms": {"p50": ms(_percentil(lat, 50)), "p90": ms(_percentil(lat, 90)),
+                            "p99": ms(_percentil(lat, 99)), "max": ms(lat[-1] if lat else None)},
+            # RSS do processo amostrado ao fim de cada etapa desta execução (no app, o servidor
+            # todo: outros trabalhos ao mesmo tempo entram na conta); None se não houver como medir
+            "pico_rss": self.pico,
+            "pico_rss_processo": rss_pico_processo(),  # desde o início do processo
+            "pico_rss_workers": self.pico_workers or None,
+        }
+
+    def salvar(self, caminho):
+        with open(caminho, "w", encoding="utf-8") as fh:
+            json.dump(self.relatorio(), fh, ensure_ascii=False, indent=2)
+
+def ativo():
+    return _ATUAL.get() is not None
+
+def ativar(medidor):
+    """Liga o medidor no contexto atual, sem desligar depois (usado nos processos do pool)."""
+    _ATUAL.set(medidor)
+
+@contextmanager
+def medir(medidor=None):
+    m = medidor or Medidor()
+    token = _ATUAL.set(m)
+    try:
+        yield m
+    finally:
+        m.fim = time.perf_counter()
+        m.amostrar()
+        _ATUAL.reset(token)
+
+@contextmanager
+def etapa(nome):
+    m = _ATUAL.get()
+    if m is None:
+        yield
+        return
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        m.somar(nome, time.perf_counter() - t)
+        m.amostrar()
+
+def por_nome(segundos):
+    m = _ATUAL.get()
+    if m is not None:
+        m.latencias.append(segundos)
+
+def chamar(func, *args):
+    """func(*args), registrando o tempo como a latência de um nome."""
+    m = _ATUAL.get()
+    if m is None:
+        return func(*args)
+    t = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        m.latencias.append(time.perf_counter() - t)
+
+def juntar(dados):
+    m = _ATUAL.get()
+    if m is not None and dados:
+        m.juntar(dados)
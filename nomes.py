@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""Leitura das listas de nomes (.txt, .csv, .xlsx) aos poucos.
+
+A codificação e o separador do CSV são detectados num prefixo do arquivo; o
+resto é lido em streaming, então a geração começa antes do fim da leitura e a
+memória não cresce com o tamanho do arquivo (só com a quantidade de nomes
+distintos, para tirar repetidos):
+
+    for nome in nomes.iter_nomes("inscritos.csv", coluna="Nome completo"):
+        ...
+    for lote in nomes.lotes(arquivo, tamanho=5000):
+        ...
+"""
+import codecs, csv, io, os, unicodedata
+from itertools import islice
+
+PREFIXO = 64 * 1024
+DELIMITADORES = ",;\t|"
+# cabeçalhos escolhidos quando a coluna não é informada (senão, a 1ª coluna)
+CABECALHOS_NOME = ("nome", "nome completo", "name", "full name", "participante", "aluno")
+
+def _abrir(arquivo):
+    """(arquivo binário, nome, precisa fechar) para caminho ou arquivo aberto/enviado."""
+    if isinstance(arquivo, (str, os.PathLike)):
+        return open(arquivo, "rb"), os.fspath(arquivo), True
+    try:
+        arquivo.seek(0)
+    except Exception:
+        pass
+    return arquivo, str(getattr(arquivo, "name", "")), False
+
+def _tipo(fh, nome: str) -> str:
+    ext = nome.lower().rsplit(".", 1)[-1] if "." in nome else ""
+    if ext in ("txt", "csv", "xlsx"):
+        return ext
+    return "xlsx" if _prefixo(fh, 4) == b"PK\x03\x04" else "csv"
+
+def _prefixo(fh, n=PREFIXO) -> bytes:
+    dados = fh.read(n)
+    fh.seek(0)
+    return dados
+
+def detectar_codificacao(prefixo: bytes) -> str:
+    """BOM, senão UTF-8 se o prefixo for válido (um caractere cortado no fim é aceito), senão cp1252/latin-1."""
+    if prefixo.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if prefixo.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(prefixo, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    try:
+        prefixo.decode("cp1252")
+        return "cp1252"
+    except UnicodeDecodeError:
+        return "latin-1"  # nunca falha
+
+def detectar_separador(amostra: str) -> str:
+    linhas = amostra.splitlines()[:50]
+    try:
+        return csv.Sniffer().sniff("\n".join(linhas), delimiters=DELIMITADORES).delimiter
+    except csv.Error:
+        # uma coluna só (ou amostra ambígua): o separador mais frequente na 1ª linha, ou vírgula
+        primeira = linhas[0] if linhas else ""
+        contagem = {d: primeira.count(d) for d in DELIMITADORES}
+        melhor = max(contagem, key=contagem.get)
+        return melhor if contagem[melhor] else ","
+
+def normalizar(nome) -> str:
+    """NFC, sem espaços sobrando (nas pontas, repetidos, tabs e quebras de linha)."""
+    return " ".join(unicodedata.normalize("NFC", str(nome)).split())
+
+# se o resto do arquivo não bater com a codificação detectada no prefixo
+RECUO = {"utf-8": "cp1252", "cp1252": "latin-1"}
+
+def _texto(fh, codificacao, lidas=None):
+    """Linhas decodificadas sem substituir nada (UnicodeDecodeError na primeira que não decodifica).
+
+    Nas codificações compatíveis com ASCII a decodificação é linha a linha, a partir dos bytes:
+    lidas (dict) guarda quantas linhas já decodificaram e se todas eram ASCII, então quem trata
+    o erro sabe exatamente o que veio antes da linha ruim."""
+    if codificacao.startswith("utf-16"):
+        texto = io.TextIOWrapper(fh, encoding=codificacao, newline="")
+        try:
+            yield from texto
+        finally:
+            texto.detach()
+        return
+    lidas = {} if lidas is None else lidas
+    lidas.update(linhas=0, ascii=True)
+    decodificar = codecs.getincrementaldecoder(codificacao)().decode  # utf-8-sig tira o BOM
+    for linha in fh:
+        texto = decodificar(linha)  # "\n" nunca está no meio de um caractere nessas codificações
+        lidas["linhas"] += 1
+        lidas["ascii"] = lidas["ascii"] and linha.isascii()
+        yield texto
+    decodificar(b"", True)
+
+def _linhas_csv(fh, codificacao=None, lidas=None):
+    prefixo = _prefixo(fh)
+    codificacao = codificacao or detectar_codificacao(prefixo)
+    separador = detectar_separador(prefixo.decode(codificacao, errors="replace"))  # só para o Sniffer
+    yield from csv.reader(_texto(fh, codificacao, lidas), delimiter=separador)
+
+def _linhas_xlsx(fh):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("Instale 'openpyxl' para ler listas .xlsx.") from None
+    wb = load_workbook(fh, read_only=True, data_only=True)
+    try:
+        for row in wb.active.iter_rows(values_only=True):
+            yield ["" if v is None else str(v) for v in row]
+    finally:
+        wb.close()
+
+def _linhas(fh, tipo, codificacao=None, lidas=None):
+    if tipo == "xlsx":
+        return _linhas_xlsx(fh)
+    return _linhas_csv(fh, codificacao, lidas)
+
+def indice_padrao(cabecalho) -> int:
+    """Coluna usada quando nenhuma é informada: a de cabeçalho "Nome"/"Name"/..., senão a 1ª."""
+    chaves = [normalizar(c).casefold() for c in cabecalho]
+    for nome in CABECALHOS_NOME:
+        if nome in chaves:
+            return chaves.index(nome)
+    return 0
+
+def _indice(cabecalho, coluna) -> int:
+    if coluna is None:
+        return indice_padrao(cabecalho)
+    if isinstance(coluna, int):
+        return coluna
+    chaves = [normalizar(c).casefold() for c in cabecalho]
+    try:
+        return chaves.index(normalizar(coluna).casefold())
+    except ValueError:
+        raise ValueError(f"coluna {coluna!r} não encontrada; colunas: {', '.join(cabecalho)}") from None
+
+def colunas(arquivo) -> list:
+    """Cabeçalho do CSV/XLSX (lista vazia para .txt)."""
+    fh, nome, fechar = _abrir(arquivo)
+    try:
+        tipo = _tipo(fh, nome)
+        if tipo == "txt":
+            return []
+        linhas = _linhas(fh, tipo)
+        try:
+            return next(linhas, [])
+        finally:
+            linhas.close()
+    finally:
+        if fechar:
+            fh.close()
+        else:
+            fh.seek(0)
+
+def iter_nomes(arquivo, coluna=None, deduplicar=True):
+    """Gera os nomes um a um: .txt (um por linha) ou a coluna `coluna` (cabeçalho ou índice) de
+       .csv/.xlsx. Sem coluna, usa a de cabeçalho "Nome"/"Name"/..., senão a 1ª.
+       Nomes são normalizados; vazios e repetidos (sem diferenciar maiúsculas) ficam de fora."""
+    if arquivo is None:
+        return
+    fh, nome, fechar = _abrir(arquivo)
+    vistos = set()  # hash (64 bits) de cada nome, não o nome inteiro
+    try:
+        for valor in _valores(fh, _tipo(fh, nome), coluna):
+            nm = normalizar(valor)
+            if not nm:
+                continue
+            if deduplicar:
+                chave = hash(nm.casefold())
+                if chave in vistos:
+                    continue
+                vistos.add(chave)
+            yield nm
+    finally:
+        if fechar:
+            fh.close()
+
+def _valores_com(fh, tipo, coluna, codificacao, lidas):
+    """Um valor por linha (None nas linhas sem a coluna), decodificando sem substituir nada."""
+    if tipo == "txt":
+        yield from _texto(fh, codificacao, lidas)
+        return
+    linhas = _linhas(fh, tipo, codificacao, lidas)
+    try:
+        i = _indice(next(linhas, []), coluna)
+        for row in linhas:
+            yield row[i] if len(row) > i else None
+    finally:
+        linhas.close()
+
+def _valores(fh, tipo, coluna):
+    """Os valores da coluna (ou linhas do .txt). A codificação vem do prefixo; se uma linha depois
+       dele não decodificar, a leitura recomeça na codificação de RECUO, pulando os valores já
+       entregues: todas as linhas antes da ruim eram ASCII, iguais nas duas. Se alguma tinha
+       acentos, a lista mistura codificações e não dá para saber qual vale: erro, em vez de
+       trocar letras por "�"."""
+    codificacao = detectar_codificacao(_prefixo(fh)) if tipo != "xlsx" else None
+    entregues, lidas = 0, {}
+    while True:
+        valores = _valores_com(fh, tipo, coluna, codificacao, lidas)
+        try:
+            for valor in islice(valores, entregues, None):
+                entregues += 1
+                if valor is not None:
+                    yield valor
+            return
+        except UnicodeDecodeError:
+            recuo = RECUO.get(codificacao)
+            if recuo is None or not lidas.get("ascii", False):
+                raise ValueError(f"a lista de nomes mistura codificações: começa em {codificacao}, mas a "
+                                 f"linha {lidas.get('linhas', 0) + 1} não é {codificacao}; salve o arquivo "
+                                 f"em UTF-8") from None
+            codificacao = recuo
+            fh.seek(0)
+        finally:
+            valores.close()
+
+def lotes(arquivo, tamanho=1000, **opcoes):
+    """Os mesmos nomes de iter_nomes, em listas de até `tamanho`."""
+    it = iter_nomes(arquivo, **opcoes)
+    while True:
+        lote = list(islice(it, tamanho))
+        if not lote:
+            return
+        yield lote
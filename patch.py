@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""Codificação por faixa: o modelo é codificado uma vez e cada certificado
+só recodifica a faixa de linhas onde o nome foi desenhado.
+
+JPEG: o modelo é salvo com um marcador de reinício (RST) por linha de MCU, o
+que torna cada linha de blocos independente; a faixa é codificada com as mesmas
+tabelas e as linhas dela substituem as do modelo. Os coeficientes são os mesmos
+de uma codificação completa, então a imagem decodificada é idêntica.
+
+PNG: as linhas usam só os filtros None/Sub (que não dependem da linha de cima)
+e são comprimidas em blocos de N linhas com Z_FULL_FLUSH; os blocos fora da
+faixa são reaproveitados e o Adler-32 é combinado.
+"""
+import io, struct, zlib
+import numpy as np
+from PIL import Image, ImageDraw
+
+import medicao
+
+_BASE = 65521
+
+def _adler_combine(a1: int, a2: int, len2: int) -> int:
+    """zlib.adler32_combine (não exposto pelo módulo zlib do Python)."""
+    rem = len2 % _BASE
+    s1 = a1 & 0xFFFF
+    s2 = (rem * s1) % _BASE
+    s1 += (a2 & 0xFFFF) + _BASE - 1
+    s2 += (a1 >> 16) + (a2 >> 16) + _BASE - rem
+    s1 %= _BASE
+    s2 %= _BASE
+    return (s2 << 16) | s1
+
+def _chunk(tipo: bytes, dados: bytes) -> bytes:
+    return struct.pack(">I", len(dados)) + tipo + dados + struct.pack(">I", zlib.crc32(tipo + dados))
+
+def _filtrar(arr) -> bytes:
+    """Filtra as linhas (uint8, h x w x bpp) escolhendo None ou Sub por linha."""
+    h, w, bpp = arr.shape
+    raw = arr.reshape(h, w * bpp)
+    sub = raw.copy()
+    sub[:, bpp:] = raw[:, bpp:] - raw[:, :-bpp]
+    custo = lambda m: np.abs(m.view(np.int8).astype(np.int32)).sum(axis=1)
+    usa_sub = custo(sub) < custo(raw)
+    linhas = np.where(usa_sub[:, None], sub, raw)
+    filtros = usa_sub.astype(np.uint8)[:, None]
+    return np.hstack([filtros, linhas]).tobytes()
+
+class ModeloPNG:
+    def __init__(self, img: Image.Image, nivel: int = 6, bloco: int = 64, dpi=None):
+        self.img = img.convert("RGB")
+        self.W, self.H = self.img.size
+        self.nivel, self.bloco = nivel, bloco
+        ihdr = struct.pack(">IIBBBBB", self.W, self.H, 8, 2, 0, 0, 0)
+        self.cabecalho = b"\x89PNG\r\n\x1a\n" + _chunk(b"IHDR", ihdr)
+        if dpi:
+            ppm = int(round(dpi / 0.0254))
+            self.cabecalho += _chunk(b"pHYs", struct.pack(">IIB", ppm, ppm, 1))
+        arr = np.asarray(self.img)
+        self.blocos = [self._comprimir(arr[y:y + bloco]) for y in range(0, self.H, bloco)]
+
+    def _comprimir(self, arr):
+        dados = _filtrar(arr)
+        z = zlib.compressobj(self.nivel, zlib.DEFLATED, -15)
+        return z.compress(dados) + z.flush(zlib.Z_FULL_FLUSH), zlib.adler32(dados), len(dados)
+
+    def faixa(self, y0: int, y1: int):
+        """Linhas [a, b) alinhadas aos blocos que cobrem [y0, y1)."""
+        a = max(0, y0) // self.bloco * self.bloco
+        b = min(self.H, -(-y1 // self.bloco) * self.bloco)
+        return a, max(a, b)
+
+    def codificar(self, faixa_img: Image.Image, a: int) -> bytes:
+        """PNG do modelo com as linhas a partir de `a` trocadas por faixa_img (largura total)."""
+        novos = np.asarray(faixa_img.convert("RGB"))
+        i0, i1 = a // self.bloco, (a + novos.shape[0] + self.bloco - 1) // self.bloco
+        trocados = [self._comprimir(novos[y:y + self.bloco]) for y in range(0, novos.shape[0], self.bloco)]
+        partes = self.blocos[:i0] + trocados + self.blocos[i1:]
+        adler = 1
+        for _, ad, n in partes:
+            adler = _adler_combine(adler, ad, n)
+        idat = b"\x78\x9c" + b"".join(p for p, _, _ in partes) + b"\x03\x00" + struct.pack(">I", adler)
+        return self.cabecalho + _chunk(b"IDAT", idat) + _chunk(b"IEND", b"")
+
+def _linhas_jpeg(jpg: bytes):
+    """Separa o JPEG em (cabeçalho até o fim do SOS, [dados de cada intervalo de reinício])."""
+    i = 2
+    while True:
+        marcador, tam = jpg[i + 1], struct.unpack(">H", jpg[i + 2:i + 4])[0]
+        i += 2 + tam
+        if marcador == 0xDA:  # SOS
+            break
+    cab, dados = jpg[:i], jpg[i:jpg.rindex(b"\xff\xd9")]
+    linhas, ini, j = [], 0, 0
+    while True:
+        j = dados.find(b"\xff", j)
+        if j < 0 or j + 1 >= len(dados):
+            break
+        if 0xD0 <= dados[j + 1] <= 0xD7:
+            linhas.append(dados[ini:j])
+            ini = j + 2
+        j += 2
+    linhas.append(dados[ini:])
+    return cab, linhas
+
+class ModeloJPEG:
+    def __init__(self, img: Image.Image, **opcoes):
+        self.img = img.convert("RGB")
+        self.W, self.H = self.img.size
+        self.opcoes = {**opcoes, "restart_marker_rows": 1}
+        self.opcoes.pop("progressive", None)
+        self.opcoes.pop("optimize", None)  # tabelas de Huffman fixas, iguais para modelo e faixa
+        sub = self.opcoes.get("subsampling", -1)
+        self.mcu = 8 if sub in (0, "4:4:4") else 16
+        self.cabecalho, self.linhas = _linhas_jpeg(self._salvar(self.img))
+        self.ativo = len(self.linhas) == -(-self.H // self.mcu)  # Pillow sem restart_marker_rows
+
+    def _salvar(self, img):
+        b = io.BytesIO(); img.save(b, "JPEG", **self.opcoes)
+        return b.getvalue()
+
+    def faixa(self, y0: int, y1: int):
+        a = max(0, y0) // self.mcu * self.mcu
+        b = min(self.H, -(-y1 // self.mcu) * self.mcu)
+        return a, max(a, b)
+
+    def codificar(self, faixa_img: Image.Image, a: int) -> bytes:
+        _, novas = _linhas_jpeg(self._salvar(faixa_img))
+        i0 = a // self.mcu
+        linhas = self.linhas[:i0] + novas + self.linhas[i0 + len(novas):]
+        out = [self.cabecalho]
+        for k, ln in enumerate(linhas):
+            if k:
+                out.append(bytes((0xFF, 0xD0 + (k - 1) % 8)))
+            out.append(ln)
+        out.append(b"\xff\xd9")
+        return b"".join(out)
+
+def desenhar_na_faixa(modelo, nome, x, y, font, color, anchor):
+    """Desenha o nome como no draw_name_on_image, mas só na faixa de linhas que ele ocupa.
+       Devolve o arquivo codificado (bytes)."""
+    l, t, r, b = font.getbbox(nome, anchor=anchor)
+    a, fim = modelo.faixa(y + t, y + b + 1)
+    if fim <= a:
+        a, fim = modelo.faixa(0, 1)
+    with medicao.etapa("desenhar"):
+        faixa = modelo.img.crop((0, a, modelo.W, fim))
+        ImageDraw.Draw(faixa).text((x, y - a), nome, fill=color, font=font, anchor=anchor)
+    with medicao.etapa("codificar"):
+        return modelo.codificar(faixa, a)
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Perfis de codificação das saídas (PNG/JPEG) e do ZIP.
+
+"original" reproduz o que o app sempre fez (PNG optimize, JPEG 95 sem
+subamostragem). Os demais trocam tempo por tamanho; medir() mostra quanto.
+"""
+import io, time, zipfile, zlib
+
+import medicao
+
+PERFIS = {
+    "original": {
+        "PNG": {"optimize": True},
+        "JPEG": {"quality": 95, "subsampling": 0},
+        "zip": {},
+    },
+    "fast": {
+        "PNG": {"compress_level": 1, "compress_type": zlib.Z_RLE},
+        "JPEG": {"quality": 90, "subsampling": 2},
+        # PNG/JPEG/PDF já vêm comprimidos: só guarda
+        "zip": {"png": (zipfile.ZIP_STORED, None), "jpg": (zipfile.ZIP_STORED, None),
+                "pdf": (zipfile.ZIP_STORED, None), "*": (zipfile.ZIP_DEFLATED, 1)},
+    },
+    "balanced": {
+        "PNG": {"compress_level": 6},
+        "JPEG": {"quality": 92, "subsampling": 0},
+        "zip": {"png": (zipfile.ZIP_STORED, None), "jpg": (zipfile.ZIP_STORED, None),
+                "*": (zipfile.ZIP_DEFLATED, 6)},
+    },
+    "smallest": {
+        "PNG": {"optimize": True},
+        "JPEG": {"quality": 85, "subsampling": 2, "progressive": True, "optimize": True},
+        "zip": {"*": (zipfile.ZIP_DEFLATED, 9)},
+    },
+}
+PERFIL_PADRAO = "original"
+ZIP_PADRAO = (zipfile.ZIP_DEFLATED, None)
+
+def opcoes(perfil, formato: str) -> dict:
+    """Argumentos de Image.save para o formato ("PNG"/"JPEG") no perfil."""
+    return dict(PERFIS[perfil or PERFIL_PADRAO].get(formato, {}))
+
+def nivel_png(perfil) -> int:
+    """Nível zlib equivalente (para o codificador por faixa do patch.py)."""
+    o = opcoes(perfil, "PNG")
+    return 9 if o.get("optimize") else o.get("compress_level", 6)
+
+def zip_para(perfil, fname: str):
+    """(compress_type, compresslevel) do ZIP para o arquivo, pela extensão."""
+    tabela = PERFIS[perfil or PERFIL_PADRAO]["zip"]
+    ext = fname.rsplit(".", 1)[-1].lower().replace("jpeg", "jpg")
+    return tabela.get(ext, tabela.get("*", ZIP_PADRAO))
+
+def codificar(img, formato: str, perfil=None, dpi=None) -> bytes:
+    """img em PNG/JPEG no perfil; dpi (opcional) vai nos metadados (pHYs / densidade JFIF)."""
+    o = opcoes(perfil, formato)
+    if dpi:
+        o["dpi"] = (dpi, dpi)
+    with medicao.etapa("codificar"):
+        b = io.BytesIO(); img.save(b, formato, **o)
+        return b.getvalue()
+
+def medir(img, formato: str, repeticoes: int = 3):
+    """Tempo médio (ms) e tamanho (bytes) de codificar img em cada perfil."""
+    linhas = []
+    for nome in PERFIS:
+        t = time.perf_counter()
+        for _ in range(repeticoes):
+            data = codificar(img, formato, nome)
+        linhas.append({"perfil": nome, "ms": round((time.perf_counter() - t) * 1000 / repeticoes, 1),
+                       "bytes": len(data)})
+    return linhas
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""Renderização em vários processos, mantendo a ordem de saída.
+
+Cada processo recebe o modelo/fonte UMA vez (no inicializador) e monta o seu
+próprio render(...); as tarefas levam só o nome e os ajustes de cada pessoa.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import medicao
+
+_RENDER = None
+_MEDIDOR = None
+
+def _iniciar(fabrica, args, medir=False):
+    global _RENDER, _MEDIDOR
+    if medir:
+        _MEDIDOR = medicao.Medidor()
+        medicao.ativar(_MEDIDOR)
+    _RENDER = fabrica(*args)
+
+def _executar(tarefa):
+    """Resultado da tarefa + o que foi medido no processo desde a última (se medindo)."""
+    resultado = medicao.chamar(_RENDER, *tarefa)
+    return resultado, _MEDIDOR.retirar() if _MEDIDOR is not None else None
+
+def workers_padrao() -> int:
+    return max(1, os.cpu_count() or 1)
+
+def mapear(fabrica, args, tarefas, workers=None, janela=4):
+    """Equivalente a `render = fabrica(*args); for t in tarefas: yield render(*t)`,
+       só que em `workers` processos.
+
+    fabrica precisa ser uma função de módulo (picklable). Mantém no máximo
+    workers*janela tarefas em andamento, então a lista de entrada pode ser lida
+    aos poucos e os resultados saem na mesma ordem das tarefas.
+    """
+    workers = workers or workers_padrao()
+    initargs = (fabrica, args, medicao.ativo())
+    with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar, initargs=initargs) as ex:
+        pendentes = deque()
+        def proximo():
+            resultado, medido = pendentes.popleft().result()
+            medicao.juntar(medido)
+            return resultado
+        for tarefa in tarefas:
+            pendentes.append(ex.submit(_executar, tuple(tarefa)))
+            if len(pendentes) >= workers * janela:
+                yield proximo()
+        while pendentes:
+            yield proximo()
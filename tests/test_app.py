@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+pytest.importorskip("streamlit")
+from streamlit.testing.v1 import AppTest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# o AppTest não tem upload de arquivo: o script troca st.file_uploader por arquivos fixos
+_SCRIPT = '''
+import io, runpy, sys
+import streamlit as st
+sys.path.insert(0, {raiz!r})
+from PIL import Image
+
+class _Enviado(io.BytesIO):
+    def __init__(self, nome, dados):
+        super().__init__(dados); self.name = nome; self.file_id = nome
+
+def _frente():
+    b = io.BytesIO(); Image.new("RGB", (600, 400), "white").save(b, "PNG")
+    return b.getvalue()
+
+_ARQUIVOS = {{"front": ("frente.png", _frente), "names": ("nomes.txt", lambda: {nomes!r}.encode("utf-8"))}}
+_ARQUIVOS.update({{"aj_up": (nome, lambda d=dados: d) for nome, dados in [{ajustes!r}] if nome}})
+
+def _uploader(label, *a, key=None, **k):
+    if key in _ARQUIVOS:
+        nome, dados = _ARQUIVOS[key]
+        return _Enviado(nome, dados())
+    return None
+
+st.file_uploader = _uploader
+runpy.run_path({app!r}, run_name="__main__")
+'''
+
+def _app(tmp_path, nomes, ajustes=(None, None)):
+    """ajustes: (nome_arquivo, bytes) enviado em "Importar ajustes"."""
+    script = tmp_path / "app_teste.py"
+    script.write_text(_SCRIPT.format(raiz=RAIZ, nomes=nomes, ajustes=ajustes, app=os.path.join(RAIZ, "app.py")),
+                      encoding="utf-8")
+    return AppTest.from_file(str(script), default_timeout=60)
+
+def test_nome_repetido_sem_remover_repetidos(tmp_path):
+    at = _app(tmp_path, "Maria Silva\nJoão\nMaria Silva\n").run()
+    assert not at.exception
+    [c for c in at.checkbox if c.label == "Remover nomes repetidos"][0].uncheck().run()
+    assert not at.exception
+    dx = [s for s in at.slider if s.label == "dx (slider)"]
+    assert len(dx) == 3
+    # ajustar um card de "Maria Silva" ajusta o nome: o outro card mostra o mesmo valor
+    dx[0].set_value(25).run()
+    assert not at.exception
+    assert [s.value for s in at.slider if s.label == "dx (slider)"] == [25, 0, 25]
+
+@pytest.mark.parametrize("ajustes", [("ajustes.json", b'{"Maria": 5}'), ("ajustes.csv", b"nome,dx\nMaria,abc\n")])
+def test_ajustes_invalidos_mostram_erro(tmp_path, ajustes):
+    at = _app(tmp_path, "Maria\n", ajustes).run()
+    assert not at.exception
+    assert any("Não foi possível importar os ajustes" in e.value for e in at.error)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+import cache
+import fontes
+
+def _contar_hashes(monkeypatch):
+    chamadas = []
+    original = cache.hash_bytes
+    monkeypatch.setattr(cache, "hash_bytes", lambda raw: chamadas.append(len(raw)) or original(raw))
+    return chamadas
+
+def test_hash_uma_vez_por_fonte(monkeypatch):
+    raw = open(fontes.FONTE_PADRAO, "rb").read() + b"\0"
+    chamadas = _contar_hashes(monkeypatch)
+    for tamanho in (20, 30, 20, 40):
+        fontes.pil(raw, tamanho)
+        fontes.bbox(raw, tamanho, "Maria")
+    assert len(chamadas) == 1
+
+def test_caminho_relido_quando_o_arquivo_muda(tmp_path):
+    caminho = tmp_path / "f.ttf"
+    caminho.write_bytes(open(fontes.FONTE_PADRAO, "rb").read())
+    h1 = fontes.registrar(str(caminho))
+    assert fontes.registrar(str(caminho)) == h1
+    caminho.write_bytes(caminho.read_bytes() + b"\0")
+    os.utime(caminho, ns=(0, 10**9))
+    assert fontes.registrar(str(caminho)) != h1
+
+def test_memoria_limitada():
+    raw = open(fontes.FONTE_PADRAO, "rb").read()
+    for i in range(3 * fontes._LIMITE):
+        h = fontes.registrar(raw + bytes([i]))
+    assert len(fontes._BYTES) <= fontes._LIMITE and len(fontes._RESOLVIDAS) <= fontes._LIMITE
+    assert fontes.pil(raw + bytes([i]), 33) is fontes._pil(h, 33)
+
+def test_utils_usa_a_bentosa_de_verdade():
+    import utils
+    assert utils._font(80).size == 80
+    assert fontes.reportlab(None) != "Helvetica"
+
+@pytest.mark.parametrize("formato", ["PDF (vetor)", "PDF (vetor, único)"])
+def test_pdf_vetor_embute_a_fonte_do_trabalho(formato):
+    import io, re, zipfile
+    import reportlab
+    from PIL import Image
+    import engine
+    vera = os.path.join(os.path.dirname(reportlab.__file__), "fonts", "Vera.ttf")
+    buf = io.BytesIO()
+    engine.escrever_zip(engine.gerar_arquivos(Image.new("RGB", (400, 300), "white"), None, ["Ana"],
+                                              {"x": 200, "y": 150}, formato, vera), buf)
+    z = zipfile.ZipFile(buf)
+    fontes_pdf = re.findall(rb"/BaseFont /\w+\+(\w+)", z.read(z.namelist()[0]))
+    assert fontes_pdf == [b"BitstreamVeraSans"]
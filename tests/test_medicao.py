@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+import os, subprocess, sys
+
+import medicao
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_importa_sem_resource():
+    """No Windows não há o módulo resource: o motor continua importando e medindo."""
+    codigo = (
+        "import sys; sys.modules['resource'] = None\n"
+        "import medicao, engine\n"
+        "with medicao.medir() as m:\n"
+        "    with medicao.etapa('x'):\n"
+        "        pass\n"
+        "r = m.relatorio()\n"
+        "assert r['pico_rss_processo'] is None and r['etapas']['x']['chamadas'] == 1\n"
+    )
+    subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, check=True)
+
+def test_pico_da_execucao_amostrado_nas_etapas():
+    with medicao.medir() as m:
+        with medicao.etapa("alocar"):
+            bloco = bytearray(64 * 2**20)
+            bloco[::4096] = b"x" * len(bloco[::4096])  # toca as páginas
+        del bloco
+    r = m.relatorio()
+    if medicao.rss_atual() is None:  # sem /proc nem psutil
+        assert r["pico_rss"] is None
+    else:
+        assert r["pico_rss"] >= 64 * 2**20
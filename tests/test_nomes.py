@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+import io
+
+import pytest
+
+import nomes
+
+# mais que o prefixo usado na detecção, só ASCII
+CORPO = "".join(f"Pessoa {i}\n" for i in range(9000)).encode("ascii")
+
+def _arquivo(dados, nome):
+    f = io.BytesIO(dados)
+    f.name = nome
+    return f
+
+@pytest.mark.parametrize("nome, cabecalho", [("lista.txt", b""), ("lista.csv", b"Nome\n")])
+def test_acentos_em_cp1252_depois_do_prefixo(nome, cabecalho):
+    assert len(CORPO) > nomes.PREFIXO
+    dados = cabecalho + CORPO + "José Conceição\n".encode("cp1252") + b"Ana\n"
+    lista = list(nomes.iter_nomes(_arquivo(dados, nome)))
+    assert lista[-2:] == ["José Conceição", "Ana"]
+    assert len(lista) == 9002
+    assert not any("�" in nm for nm in lista)
+
+def test_codificacoes_misturadas_dao_erro():
+    dados = "Zé\n".encode("utf-8") + CORPO + "José\n".encode("cp1252")
+    with pytest.raises(ValueError, match="codificações"):
+        list(nomes.iter_nomes(_arquivo(dados, "lista.txt")))
+
+def test_utf8_continua_igual():
+    dados = "Nome;Cidade\nJosé;São Paulo\nAna;Belém\n".encode("utf-8")
+    assert list(nomes.iter_nomes(_arquivo(dados, "lista.csv"))) == ["José", "Ana"]
+
+
+def test_utf8_no_mesmo_bloco_que_o_byte_ruim_da_erro():
+    dados = CORPO + "José\n".encode("utf-8") + "Zé\n".encode("cp1252")
+    with pytest.raises(ValueError, match="codificações"):
+        list(nomes.iter_nomes(_arquivo(dados, "nomes.txt")))
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+import os, subprocess, sys
+
+import bench
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_importar_o_motor_nao_carrega_pacotes_pesados():
+    """Os pacotes de bench.PESADOS só entram quando o formato que os usa é escolhido."""
+    codigo = (
+        "import sys\n"
+        "import engine, utils, cache, cache_disco, fontes, medicao, nomes, perfis, pool, trabalhos\n"
+        f"print(','.join(m for m in {bench.PESADOS!r} if m in sys.modules))\n"
+    )
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, check=True, capture_output=True, text=True)
+    assert saida.stdout.strip() == ""
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""O mesmo layout põe o nome no mesmo lugar em todos os formatos (y do layout: para baixo)."""
+import io, re
+
+import pytest
+from PIL import Image
+
+import engine
+import fontes
+
+W, H = 800, 600
+NOME = "Maria Silva"
+
+def _um(formato, layout):
+    frente = Image.new("RGB", (W, H), "white")
+    return next(iter(engine.gerar_arquivos(frente, None, [NOME], layout, formato, disco=None)))[1]
+
+def _base_esperada(layout):
+    return layout["y"] + engine._ate_base(None, layout["tamanho"], layout["alinhamento"])
+
+def _linhas_com_tinta(img):
+    import numpy as np
+    linhas = np.where(np.asarray(img.convert("L")).min(axis=1) < 128)[0]
+    return linhas.min(), linhas.max()
+
+def _base_png(layout):
+    """Linha de base do PNG: desloca uma referência desenhada na base (âncora "ls") até a tinta bater."""
+    from PIL import ImageDraw
+    img = Image.open(io.BytesIO(_um("PNG", layout)))
+    ref = Image.new("RGB", (W, H), "white")
+    ImageDraw.Draw(ref).text((layout["x"], 300), NOME, font=engine.load_font(None, layout["tamanho"]),
+                             fill="#000000", anchor="ls")
+    (topo, fim), (topo_ref, fim_ref) = _linhas_com_tinta(img), _linhas_com_tinta(ref)
+    assert fim - topo == fim_ref - topo_ref
+    return 300 + topo - topo_ref
+
+def _base_svg(layout):
+    svg = _um("SVG (vetor)", layout)
+    svg = svg.decode("utf-8") if isinstance(svg, bytes) else svg
+    return float(re.search(r' y="([-\d.]+)">', svg).group(1))
+
+def _base_eps(layout):
+    return H - float(re.search(rb"([-\d.]+) ([-\d.]+) moveto", _um("EPS (vetor)", layout)).group(2))
+
+def _conteudo_pdf(pdf):
+    """Streams do PDF do ReportLab (ASCII85 + Flate) decodificados e concatenados."""
+    import base64, zlib
+    partes = []
+    for dados in re.findall(rb"stream\r?\n(.*?)endstream", pdf, re.S):
+        try:
+            partes.append(zlib.decompress(base64.a85decode(b"<~" + dados.strip(), adobe=True)))
+        except (ValueError, zlib.error):
+            partes.append(dados)
+    return b"\n".join(partes)
+
+def _base_pdf(formato, layout):
+    return H - float(re.search(rb"1 0 0 1 [-\d.]+ ([-\d.]+) Tm", _conteudo_pdf(_um(formato, layout))).group(1))
+
+@pytest.mark.parametrize("y", [100, 300, 520])
+@pytest.mark.parametrize("alinhamento", ["Centro", "Esquerda"])
+def test_mesma_altura_em_todos_os_formatos(y, alinhamento):
+    layout = {"x": 400, "y": y, "tamanho": 48, "alinhamento": alinhamento}
+    esperada = _base_esperada(layout)
+    assert abs(_base_png(layout) - esperada) <= 1
+    assert _base_svg(layout) == pytest.approx(esperada)
+    assert _base_eps(layout) == pytest.approx(esperada, abs=0.01)
+    for formato in ("PDF (vetor)", "PDF (vetor, único)", "PDF (único)"):
+        assert _base_pdf(formato, layout) == pytest.approx(esperada, abs=1), formato
+
+
+def _inicio_esperado(layout):
+    """x do início do nome: o x do layout é o início (Esquerda), o meio (Centro) ou o fim (Direita)."""
+    largura = fontes.largura_pdf(fontes.reportlab(None), layout["tamanho"], NOME)
+    return layout["x"] - largura * {"Esquerda": 0, "Centro": 0.5, "Direita": 1}[layout["alinhamento"]]
+
+def _primeira_coluna_com_tinta(img):
+    import numpy as np
+    colunas = np.where(np.asarray(img.convert("L")).min(axis=0) < 128)[0]
+    return colunas.min()
+
+def _inicio_png(layout):
+    """Início do nome no PNG: compara a tinta com uma referência desenhada a partir de x=100 (âncora "ls")."""
+    from PIL import ImageDraw
+    img = Image.open(io.BytesIO(_um("PNG", layout)))
+    ref = Image.new("RGB", (W, H), "white")
+    ImageDraw.Draw(ref).text((100, 300), NOME, font=engine.load_font(None, layout["tamanho"]),
+                             fill="#000000", anchor="ls")
+    return 100 + _primeira_coluna_com_tinta(img) - _primeira_coluna_com_tinta(ref)
+
+def _inicio_svg(layout):
+    svg = _um("SVG (vetor)", layout)
+    svg = svg.decode("utf-8") if isinstance(svg, bytes) else svg
+    ancora, x = re.search(r'text-anchor="(\w+)" x="([-\d.]+)"', svg).groups()
+    largura = fontes.largura_pdf(fontes.reportlab(None), layout["tamanho"], NOME)
+    return float(x) - largura * {"start": 0, "middle": 0.5, "end": 1}[ancora]
+
+def _inicio_eps(layout):
+    return float(re.search(rb"([-\d.]+) ([-\d.]+) moveto", _um("EPS (vetor)", layout)).group(1))
+
+def _inicio_pdf(formato, layout):
+    return float(re.search(rb"1 0 0 1 ([-\d.]+) [-\d.]+ Tm", _conteudo_pdf(_um(formato, layout))).group(1))
+
+@pytest.mark.parametrize("x", [300, 400, 500])  # o nome inteiro dentro da página
+@pytest.mark.parametrize("alinhamento", ["Centro", "Esquerda", "Direita"])
+def test_mesmo_x_em_todos_os_formatos(x, alinhamento):
+    layout = {"x": x, "y": 300, "tamanho": 48, "alinhamento": alinhamento}
+    esperado = _inicio_esperado(layout)
+    assert abs(_inicio_png(layout) - esperado) <= 2
+    assert _inicio_svg(layout) == pytest.approx(esperado)
+    assert _inicio_eps(layout) == pytest.approx(esperado, abs=0.01)
+    for formato in ("PDF (vetor)", "PDF (vetor, único)", "PDF (único)"):
+        assert _inicio_pdf(formato, layout) == pytest.approx(esperado, abs=0.01), formato
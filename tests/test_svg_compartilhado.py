@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import io, os, zipfile
+
+from PIL import Image, ImageFont
+
+import engine
+import utils
+
+NOMES = ["José Conceição", "Ana"]
+
+def _zip(fonte=None):
+    frente = Image.new("RGB", (400, 300), "white")
+    buf = io.BytesIO()
+    engine.escrever_zip(engine.gerar_arquivos(frente, None, NOMES, {"x": 200, "y": 150},
+                                              "SVG (vetor, compartilhado)", fonte), buf)
+    return zipfile.ZipFile(buf)
+
+def _familia(raw):
+    return ImageFont.truetype(io.BytesIO(raw), 20).getname()[0]
+
+def test_fonte_padrao_no_zip_e_valida():
+    z = _zip()
+    raw = z.read(utils.SVG_FONTE)
+    assert raw
+    assert _familia(raw) == _familia(open(engine.fontes.FONTE_PADRAO, "rb").read())
+    svg = [n for n in z.namelist() if n.endswith(".svg")][0]
+    assert 'url("fonte.ttf")' in z.read(svg).decode("utf-8")
+
+def test_fonte_escolhida_vai_no_zip():
+    import reportlab
+    vera = os.path.join(os.path.dirname(reportlab.__file__), "fonts", "Vera.ttf")
+    with open(vera, "rb") as fh:
+        raw = fh.read()
+    assert _familia(_zip(raw).read(utils.SVG_FONTE)) == "Bitstream Vera Sans"
+
+def test_exportacao_utils_usa_a_fonte():
+    itens = [(nm, nm, {"dx": 0, "dy": 0, "tamanho": 30}) for nm in NOMES]
+    meta = engine._meta(Image.new("RGB", (400, 300), "white"))
+    entradas = dict(utils.iter_exportacao(meta, None, itens, (400, 300), 200, 150, 0, 0, "#000000",
+                                          "SVG (vetor, compartilhado)"))
+    assert _familia(entradas[utils.SVG_FONTE]) == _familia(open(engine.fontes.FONTE_PADRAO, "rb").read())
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+import time
+
+import medicao
+import trabalhos
+
+def _produtor(n, prefixo):
+    def render(i):
+        with medicao.etapa("desenhar"):
+            time.sleep(0.002)
+        return [(f"{prefixo}{i}.txt", b"x")]
+    def produzir(pular):
+        return ((i, medicao.chamar(render, i)) for i in range(n) if i not in pular)
+    return produzir, n
+
+def test_trabalhos_em_paralelo_medem_separado(tmp_path):
+    ts = [trabalhos.Trabalho(f"t{n}", *_produtor(n, f"t{n}_"), pasta=str(tmp_path / f"t{n}")) for n in (40, 5)]
+    with medicao.medir() as fora:  # o medidor de quem iniciou os trabalhos também não recebe nada
+        for t in ts:
+            t.iniciar()
+        for t in ts:
+            t.esperar()
+    assert [t.situacao for t in ts] == ["concluido", "concluido"]
+    assert [t.relatorio["nomes"] for t in ts] == [40, 5]
+    assert [t.relatorio["etapas"]["desenhar"]["chamadas"] for t in ts] == [40, 5]
+    assert fora.relatorio()["nomes"] == 0
+    assert not medicao.ativo()
+
+def test_terminados_soltam_o_produtor_e_saem_da_memoria(tmp_path, monkeypatch):
+    monkeypatch.setattr(trabalhos, "PASTA", str(tmp_path))
+    monkeypatch.setattr(trabalhos, "_ATIVOS", {})
+    monkeypatch.setattr(trabalhos, "_TERMINADOS", 2)
+    for n in range(4):
+        t = trabalhos.iniciar(f"k{n}", *_produtor(3, "a"))
+        t.esperar()
+        assert t.situacao == "concluido" and t.produzir is None
+    trabalhos.iniciar("k4", *_produtor(3, "a")).esperar()
+    assert sorted(trabalhos._ATIVOS) == ["k2", "k3", "k4"]
+
+def test_podar_apaga_checkpoints_velhos_e_os_que_passam_do_limite(tmp_path):
+    import os
+    for k, idade, tamanho in (("velho", 30, 10), ("grande", 2, 3000), ("novo", 1, 3000), ("andando", 3, 3000)):
+        os.makedirs(tmp_path / k / "arquivos")
+        (tmp_path / k / "arquivos" / "0_0").write_bytes(b"x" * tamanho)
+        for caminho in (tmp_path / k, tmp_path / k / "arquivos", tmp_path / k / "arquivos" / "0_0"):
+            os.utime(caminho, (time.time() - idade * 86400,) * 2)
+    total = trabalhos.podar(str(tmp_path), limite_bytes=7000, idade_s=7 * 86400, manter={"andando"})
+    assert sorted(os.listdir(tmp_path)) == ["andando", "novo"]
+    assert total == 6000
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""Geração em segundo plano, com progresso, cancelamento e retomada.
+
+Cada trabalho roda numa thread e grava cada certificado pronto numa pasta de
+checkpoint (arquivos + um manifesto com uma linha por pessoa). Se o processo
+cair, a página for recarregada ou o trabalho for cancelado, iniciar de novo o
+mesmo trabalho (mesma chave) pula quem já está no manifesto. O ZIP final é
+montado a partir da pasta, na ordem da lista.
+
+    t = trabalhos.iniciar(chave, produzir, total, perfil)
+    t.estado()                   # {"estado", "feitos", "total", "por_s", "eta_s", ...}
+    t.cancelar()
+    async for e in t.acompanhar(): ...   # o mesmo estado, para código asyncio
+
+produzir(pular) devolve (i, [(nome_arquivo, bytes)]) para cada índice i que
+não está em pular (ver engine.gerar_por_nome).
+"""
+import asyncio, json, os, shutil, tempfile, threading, time, zipfile
+
+import cache
+import medicao
+import perfis
+
+PASTA = os.environ.get("CERT_TRABALHOS_DIR", os.path.join(tempfile.gettempdir(), "certificados_trabalhos"))
+LIMITE_MB = int(os.environ.get("CERT_TRABALHOS_MB", "4096"))
+IDADE_DIAS = float(os.environ.get("CERT_TRABALHOS_DIAS", "7"))
+
+_ATIVOS = {}  # chave -> Trabalho (sobrevive a recarregar a página, não a reiniciar o servidor)
+_LOCK = threading.Lock()
+_TERMINADOS = 16  # trabalhos terminados mantidos em _ATIVOS (os mais recentes); o resto volta pelo checkpoint
+
+def chave(*partes) -> str:
+    """Hash das entradas do trabalho (ver cache.hash_partes)."""
+    return cache.hash_partes(*partes)
+
+class Trabalho:
+    def __init__(self, chave, produzir, total, perfil=None, pasta=None, medidor=None):
+        self.chave = chave
+        self.produzir = produzir
+        self.total = total
+        self.perfil = perfil
+        self.pasta = pasta or os.path.join(PASTA, chave)
+        self.zip = os.path.join(self.pasta, "certificados.zip")
+        self.situacao = "parado"
+        self.erro = None
+        self.medidor = medidor
+        self.relatorio = None
+        self.feitos = self.retomados = 0
+        self.inicio = self.fim = None
+        self._cancelar = threading.Event()
+        self._thread = None
+
+    # --------------------------
+    # Checkpoint
+    # --------------------------
+    def _manifesto(self):
+        """{i: [nome_arquivo, ...]} de quem já foi gravado (linhas incompletas no fim são ignoradas)."""
+        feitos = {}
+        try:
+            with open(os.path.join(self.pasta, "manifesto.jsonl"), encoding="utf-8") as fh:
+                for linha in fh:
+                    try:
+                        d = json.loads(linha)
+                    except ValueError:
+                        break
+                    feitos[d["i"]] = d["arquivos"]
+        except FileNotFoundError:
+            pass
+        return feitos
+
+    def _arquivo(self, i, k):
+        return os.path.join(self.pasta, "arquivos", f"{i}_{k}")
+
+    def _montar_zip(self, feitos):
+        tmp = self.zip + ".tmp"
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as z:
+            for i in sorted(feitos):
+                for k, fname in enumerate(feitos[i]):
+                    tipo, nivel = perfis.zip_para(self.perfil, fname)
+                    with medicao.etapa("zip"):
+                        z.write(self._arquivo(i, k), fname, compress_type=tipo, compresslevel=nivel)
+        os.replace(tmp, self.zip)
+
+    # --------------------------
+    # Execução
+    # --------------------------
+    def iniciar(self):
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._cancelar.clear()
+        self.situacao, self.erro = "rodando", None
+        self._thread = threading.Thread(target=self.rodar, name=f"trabalho-{self.chave[:8]}", daemon=True)
+        self._thread.start()
+        return self
+
+    def rodar(self):
+        """Executa o trabalho na thread atual (a CLI chama direto; o app usa iniciar())."""
+        self.situacao = "rodando"
+        os.makedirs(os.path.join(self.pasta, "arquivos"), exist_ok=True)
+        feitos = self._manifesto()
+        self.feitos = self.retomados = len(feitos)
+        self.inicio, self.fim = time.time(), None
+        try:
+            with medicao.medir(self.medidor) as m:
+                if len(feitos) < self.total:
+                    self._gerar(feitos)
+                if not self._cancelar.is_set():
+                    self._montar_zip(feitos)
+            self.relatorio = m.relatorio()
+            self.situacao = "cancelado" if self._cancelar.is_set() else "concluido"
+        except Exception as e:
+            self.situacao, self.erro = "erro", f"{type(e).__name__}: {e}"
+        finally:
+            self.fim = time.time()
+            self.produzir = None  # segura modelo, fonte e nomes; retomar cria outro Trabalho (ver iniciar)
+
+    def _gerar(self, feitos):
+        resultados = self.produzir(set(feitos))
+        try:
+            with open(os.path.join(self.pasta, "manifesto.jsonl"), "a", encoding="utf-8") as man:
+                for i, entradas in resultados:
+                    for k, (_, data) in enumerate(entradas):
+                        with open(self._arquivo(i, k), "wb") as fh:
+                            fh.write(data.encode("utf-8") if isinstance(data, str) else data)
+                    # a linha do manifesto só entra depois dos arquivos: o que está nele está completo
+                    man.write(json.dumps({"i": i, "arquivos": [f for f, _ in entradas]}, ensure_ascii=False) + "\n")
+                    man.flush()
+                    feitos[i] = [f for f, _ in entradas]
+                    self.feitos = len(feitos)
+                    if self._cancelar.is_set():
+                        break
+        finally:
+            close = getattr(resultados, "close", None)
+            if close:
+                close()
+
+    def cancelar(self):
+        """Para depois do certificado atual; o que já foi gravado continua no checkpoint."""
+        self._cancelar.set()
+
+    def esperar(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def descartar(self):
+        """Cancela e apaga o checkpoint."""
+        self.cancelar()
+        self.esperar()
+        shutil.rmtree(self.pasta, ignore_errors=True)
+        with _LOCK:
+            if _ATIVOS.get(self.chave) is self:
+                del _ATIVOS[self.chave]
+
+    # --------------------------
+    # Estado
+    # --------------------------
+    def estado(self) -> dict:
+        agora = self.fim or time.time()
+        decorrido = agora - self.inicio if self.inicio else 0.0
+        novos = self.feitos - self.retomados
+        por_s = novos / decorrido if decorrido > 0 and novos else None
+        restantes = self.total - self.feitos
+        return {
+            "chave": self.chave, "estado": self.situacao, "feitos": self.feitos, "total": self.total,
+            "retomados": self.retomados, "decorrido_s": round(decorrido, 1),
+            "por_s": round(por_s, 2) if por_s else None,
+            "eta_s": round(restantes / por_s, 1) if por_s and self.situacao == "rodando" else None,
+            "erro": self.erro, "zip": self.zip if self.situacao == "concluido" else None,
+        }
+
+    async def acompanhar(self, intervalo=0.5):
+        """Gerador assíncrono do estado, até o trabalho terminar (concluído, cancelado ou erro)."""
+        while True:
+            e = self.estado()
+            yield e
+            if e["estado"] != "rodando":
+                return
+            await asyncio.sleep(intervalo)
+
+    async def aguardar(self):
+        await asyncio.to_thread(self.esperar)
+        return self.estado()
+
+def obter(chave):
+    return _ATIVOS.get(chave)
+
+def _esquecer_terminados():
+    """Tira de _ATIVOS os terminados além dos _TERMINADOS mais recentes (chamar com _LOCK)."""
+    terminados = sorted((t for t in _ATIVOS.values() if t.situacao != "rodando"), key=lambda t: t.fim or 0)
+    for t in terminados[:max(0, len(terminados) - _TERMINADOS)]:
+        del _ATIVOS[t.chave]
+
+def iniciar(chave, produzir, total, perfil=None, pasta=None):
+    """Inicia (ou retoma do checkpoint) o trabalho; se o mesmo já estiver rodando, devolve ele."""
+    with _LOCK:
+        t = _ATIVOS.get(chave)
+        if t is None or t.situacao != "rodando":
+            _esquecer_terminados()
+            if pasta is None and LIMITE_MB > 0:
+                podar(PASTA, manter={chave} | {k for k, a in _ATIVOS.items() if a.situacao == "rodando"})
+            t = _ATIVOS[chave] = Trabalho(chave, produzir, total, perfil, pasta)
+            t.iniciar()
+        return t
+
+def podar(pasta=PASTA, limite_bytes=LIMITE_MB * 1024 * 1024, idade_s=IDADE_DIAS * 86400, manter=()) -> int:
+    """Apaga os checkpoints em pasta parados há mais de idade_s e, se passar do limite, os mais
+       antigos até 90% dele (menos os de manter: chaves em andamento). Devolve o total em bytes."""
+    trabalhos = []
+    try:
+        chaves = os.listdir(pasta)
+    except OSError:
+        return 0
+    for k in chaves:
+        raiz = os.path.join(pasta, k)
+        if not os.path.isdir(raiz):
+            continue
+        mtime, tamanho = os.stat(raiz).st_mtime, 0
+        for r, _, nomes in os.walk(raiz):
+            for nome in nomes:
+                try:
+                    st = os.stat(os.path.join(r, nome))
+                except OSError:
+                    continue
+                mtime, tamanho = max(mtime, st.st_mtime), tamanho + st.st_size
+        trabalhos.append((mtime, tamanho, k))
+    trabalhos.sort()
+    vencimento = time.time() - idade_s
+    total = sum(t for _, t, _ in trabalhos)
+    alvo = limite_bytes * 0.9
+    for mtime, tamanho, k in trabalhos:
+        if mtime >= vencimento and total <= alvo:
+            break
+        if k in manter:
+            continue
+        shutil.rmtree(os.path.join(pasta, k), ignore_errors=True)
+        total -= tamanho
+    return total
+
+def checkpoint(chave) -> int:
+    """Quantos certificados já estão no checkpoint do trabalho (0 se não houver)."""
+    return len(Trabalho(chave, None, 0)._manifesto())
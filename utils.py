@@ -1,20 +1,25 @@
 # -*- coding: utf-8 -*-
-import io, os, base64, zipfile
+import io, sys, base64, zipfile, warnings
+from functools import lru_cache
 from typing import List, Dict
-import streamlit as st
-from PIL import Image, ImageDraw, ImageFont
-import pandas as pd
-# Vetor/relatórios
-import svgwrite
-from reportlab.pdfgen import canvas as pdf_canvas
-from reportlab.lib.utils import ImageReader
-from reportlab.lib.colors import HexColor
-
-try:
-    import cairosvg
-    HAS_CAIROSVG = True
-except Exception:
-    HAS_CAIROSVG = False
+from PIL import Image, ImageDraw
+
+import cache
+import cache_disco
+import fontes
+import medicao
+import nomes
+import pool
+
+# svgwrite, reportlab e cairosvg só são importados quando o formato que usa cada um é escolhido
+@lru_cache(maxsize=None)
+def _cairosvg():
+    """Módulo cairosvg, ou None se não estiver instalado."""
+    try:
+        import cairosvg
+        return cairosvg
+    except Exception:
+        return None
 
 # Canvas availability check
 def canvas_disponivel() -> bool:
@@ -24,43 +29,56 @@ def canvas_disponivel() -> bool:
     except Exception:
         return False
 
-FONTE_BENTOSA = os.path.join(os.path.dirname(__file__), "fonts", "Bentosa.ttf")
-
-def _font(size:int):
-    try:
-        return ImageFont.truetype(FONTE_BENTOSA, size)
-    except Exception:
-        return ImageFont.load_default()
+def _font(size:int, fonte=None):
+    """fonte: bytes ou caminho do TTF; None = Bentosa (fontes.FONTE_PADRAO)."""
+    return fontes.pil(fonte, size)
 
-def _text_size(draw, text, font):
-    bbox = draw.textbbox((0,0), text, font=font)
-    return bbox[2]-bbox[0], bbox[3]-bbox[1]
+def _avisar(msg: str):
+    """Mostra o aviso na interface quando rodando no Streamlit; fora dele, só emite um warning."""
+    if "streamlit" in sys.modules:
+        sys.modules["streamlit"].warning(msg)
+    else:
+        warnings.warn(msg)
 
 def carregar_base_preview(uploaded_file):
-    """Retorna (PIL.Image|None, meta_dict)"""
+    """Retorna (PIL.Image|None, meta_dict). A imagem vem do cache: não desenhe nela sem .copy()."""
     name = (uploaded_file.name or "").lower()
     raw = uploaded_file.read()
     uploaded_file.seek(0)
     if name.endswith((".png",".jpg",".jpeg")):
-        img = Image.open(io.BytesIO(raw)).convert("RGB")
-        return img, {"type":"raster", "raw":raw}
+        return cache.imagem(raw), {"type":"raster", "raw":raw}
     if name.endswith(".svg"):
-        if not HAS_CAIROSVG:
-            st.warning("Instale 'cairosvg' para pré-visualizar SVG.")
+        if _cairosvg() is None:
+            _avisar("Instale 'cairosvg' para pré-visualizar SVG.")
             return None, {"type":"svg", "raw":raw}
-        png = cairosvg.svg2png(bytestring=raw)
-        img = Image.open(io.BytesIO(png)).convert("RGB")
-        return img, {"type":"svg", "raw":raw}
+        meta = {"type":"svg", "raw":raw}
+        return _fundo_img(meta, None), meta
     # EPS/PDF preview: fallback branco (mantém bytes para exportação vetorial)
-    st.warning("Pré-visualização de PDF/EPS não disponível (sem poppler/ghostscript). Usando tamanho padrão.")
+    _avisar("Pré-visualização de PDF/EPS não disponível (sem poppler/ghostscript). Usando tamanho padrão.")
     img = None
     return img, {"type":"pdf" if name.endswith(".pdf") else "eps", "raw":raw}
 
+def _fundo_png(meta, size):
+    """Fundo (frente/verso) em PNG no tamanho size, via cache; None se não houver como rasterizar."""
+    if meta["type"] == "raster":
+        return cache.png(meta["raw"], size)
+    if meta["type"] == "svg" and _cairosvg() is not None:
+        W,H = size if size else (None, None)
+        def construir():
+            with medicao.etapa("modelo"):
+                return _cairosvg().svg2png(bytestring=meta["raw"], output_width=W, output_height=H)
+        return cache.obter((cache.hash_bytes(meta["raw"]), "svg", size and tuple(size)), construir)
+    return None
+
+def _fundo_img(meta, size, filtro=None):
+    """Fundo decodificado (PIL RGB, compartilhado pelo cache) ou None. filtro: ver cache.FILTROS."""
+    if meta["type"] == "raster":
+        return cache.imagem(meta["raw"], size, filtro)
+    png = _fundo_png(meta, size)
+    return cache.imagem(png) if png is not None else None
+
 def ler_nomes(nomes_file) -> List[str]:
-    if nomes_file.name.endswith(".txt"):
-        return [n.strip() for n in nomes_file.read().decode("utf-8").splitlines() if n.strip()]
-    df = pd.read_csv(nomes_file)
-    return df.iloc[:,0].dropna().astype(str).tolist()
+    return list(nomes.iter_nomes(nomes_file))
 
 def desenhar_preview_nome(base_img, base_size, nome, x_anchor, y_anchor, gdx, gdy, dx, dy, font_size, color):
     """Gera preview PNG bytes (usa base_img quando disponível, senão branco)."""
@@ -71,7 +89,8 @@ def desenhar_preview_nome(base_img, base_size, nome, x_anchor, y_anchor, gdx, gd
         img = base_img.copy()
     draw = ImageDraw.Draw(img)
     font = _font(font_size)
-    tw, th = _text_size(draw, nome, font)
+    l, t, r, b = fontes.bbox(None, font_size, nome)
+    tw, th = r - l, b - t
     x = (x_anchor + gdx + dx) - tw//2
     y = (y_anchor + gdy + dy) - th//2
     draw.text((x,y), nome, font=font, fill=color)
@@ -88,148 +107,352 @@ def _safe_filename(name: str) -> str:
     return name or "certificado"
 
 # ---------------- EXPORTAÇÃO ----------------
-def _export_pdf_vector(front_meta, verso_meta, names, ajustes, size, anchor, gdx, gdy, color):
-    W,H = size; x_anchor,y_anchor = anchor
-    out = io.BytesIO()
+def _zip(entradas, destino=None):
+    """Grava (nome_arquivo, bytes) num ZIP à medida que chegam.
+       Sem destino, devolve os bytes do ZIP (comportamento antigo).
+    """
+    out = destino if destino is not None else io.BytesIO()
     with zipfile.ZipFile(out, "w") as zf:
-        for nome in names:
-            a = ajustes[nome]
-            buf = io.BytesIO()
-            c = pdf_canvas.Canvas(buf, pagesize=(W,H))
-            # fundo
-            if front_meta["type"] == "raster":
-                ib = io.BytesIO(front_meta["raw"]); img = Image.open(ib).convert("RGB")
-                pb = io.BytesIO(); img = img.resize((W,H)); img.save(pb, format="PNG"); pb.seek(0)
-                c.drawImage(ImageReader(pb), 0, 0, width=W, height=H)
-            elif front_meta["type"] == "svg" and HAS_CAIROSVG:
-                png = cairosvg.svg2png(bytestring=front_meta["raw"], output_width=W, output_height=H)
-                pb = io.BytesIO(png); c.drawImage(ImageReader(pb), 0, 0, width=W, height=H)
-            # texto vetorial
-            try:
-                from reportlab.pdfbase import pdfmetrics
-                from reportlab.pdfbase.ttfonts import TTFont
-                pdfmetrics.registerFont(TTFont("Bentosa", FONTE_BENTOSA))
-                font_name = "Bentosa"
-            except Exception:
-                font_name = "Helvetica"
+        for fname, data in entradas:
+            with medicao.etapa("zip"):
+                zf.writestr(fname, data)
+    if destino is not None:
+        return destino
+    out.seek(0)
+    return out.getvalue()
+
+def _itens(names, ajustes):
+    """(arquivo, nome, ajuste) no formato esperado pelos render(...) dos exportadores."""
+    for nome in names:
+        yield _safe_filename(nome), nome, ajustes[nome]
+
+# "ancora" do ajuste (opcional, como o text-anchor do SVG): o x é o início, o meio ou o fim do nome
+_ANCORA = {"start": 0, "middle": 0.5, "end": 1}
+
+def _x_inicio(x, largura, a):
+    """x do início do nome, pela âncora do ajuste (padrão: centralizado em x)."""
+    return x - largura * _ANCORA[a.get("ancora", "middle")]
+
+def _iter(render, itens):
+    for arquivo, nome, a in itens:
+        yield medicao.chamar(render, arquivo, nome, a)
+
+def _render_pdf_vector(front_meta, verso_meta, size, anchor, gdx, gdy, color, fonte=None):
+    W,H = size; x_anchor,y_anchor = anchor
+    # fundos preparados uma vez por lote (e reaproveitados entre lotes pelo cache)
+    front_png = _fundo_png(front_meta, (W,H))
+    verso_png = _fundo_png(verso_meta, (W,H)) if verso_meta is not None else None
+    from reportlab.pdfgen import canvas as pdf_canvas
+    from reportlab.lib.utils import ImageReader
+    from reportlab.lib.colors import HexColor
+    font_name = fontes.reportlab(fonte)
+    def render(arquivo, nome, a):
+        buf = io.BytesIO()
+        c = pdf_canvas.Canvas(buf, pagesize=(W,H))
+        # fundo
+        if front_png is not None:
+            c.drawImage(ImageReader(io.BytesIO(front_png)), 0, 0, width=W, height=H)
+        # texto vetorial
+        with medicao.etapa("desenhar"):
             c.setFont(font_name, a["tamanho"])
             c.setFillColor(HexColor(color))
-            from reportlab.pdfbase import pdfmetrics
-            tw = pdfmetrics.stringWidth(nome, font_name, a["tamanho"])
-            x = (x_anchor + gdx + a["dx"]) - tw/2
+            tw = fontes.largura_pdf(font_name, a["tamanho"], nome)
+            x = _x_inicio(x_anchor + gdx + a["dx"], tw, a)
             y = (y_anchor + gdy + a["dy"])
             c.drawString(x, y, nome)
+        c.showPage()
+        # verso (rasterizado) se existir
+        if verso_meta is not None:
+            c.setPageSize((W,H))
+            if verso_png is not None:
+                c.drawImage(ImageReader(io.BytesIO(verso_png)), 0, 0, width=W, height=H)
             c.showPage()
-            # verso (rasterizado) se existir
-            if verso_meta is not None:
-                c.setPageSize((W,H))
-                if verso_meta["type"] == "raster":
-                    vb = io.BytesIO(verso_meta["raw"]); vimg = Image.open(vb).convert("RGB")
-                    vpb = io.BytesIO(); vimg = vimg.resize((W,H)); vimg.save(vpb, format="PNG"); vpb.seek(0)
-                    c.drawImage(ImageReader(vpb), 0, 0, width=W, height=H)
-                elif verso_meta["type"] == "svg" and HAS_CAIROSVG:
-                    vpng = cairosvg.svg2png(bytestring=verso_meta["raw"], output_width=W, output_height=H)
-                    c.drawImage(ImageReader(io.BytesIO(vpng)), 0, 0, width=W, height=H)
-                c.showPage()
+        with medicao.etapa("codificar"):
             c.save(); buf.seek(0)
-            zf.writestr(f"{_safe_filename(nome)}.pdf", buf.getvalue())
-    out.seek(0)
-    return out.getvalue()
+        return f"{arquivo}.pdf", buf.getvalue()
+    return render
 
-def _export_svg_vector(front_meta, names, ajustes, size, anchor, gdx, gdy, color):
+def _export_pdf_vector(front_meta, verso_meta, names, ajustes, size, anchor, gdx, gdy, color, fonte=None):
+    return _zip(_iter(_render_pdf_vector(front_meta, verso_meta, size, anchor, gdx, gdy, color, fonte),
+                      _itens(names, ajustes)))
+
+# SVG montado a partir de um modelo de texto pronto (mesma saída do svgwrite.Drawing, sem montar um por nome)
+_SVG_RAIZ = ('<svg baseProfile="full" height="{H}" version="1.1" width="{W}" xmlns="http://www.w3.org/2000/svg" '
+             'xmlns:ev="http://www.w3.org/2001/xml-events" xmlns:xlink="http://www.w3.org/1999/xlink">')
+SVG_FUNDO, SVG_FONTE = "fundo.png", "fonte.ttf"  # recursos do "SVG (vetor, compartilhado)", uma vez por ZIP
+
+def _render_svg_vector(front_meta, size, anchor, gdx, gdy, color, compartilhado=False):
+    from xml.sax.saxutils import escape, quoteattr
     W,H = size; x_anchor,y_anchor = anchor
-    out = io.BytesIO()
-    with zipfile.ZipFile(out, "w") as zf:
-        # fundo rasterizado (se houver)
-        if front_meta["type"] == "raster":
-            bg = Image.open(io.BytesIO(front_meta["raw"])).convert("RGB").resize((W,H))
-            pbg = io.BytesIO(); bg.save(pbg, format="PNG"); pbg.seek(0)
-            b64 = base64.b64encode(pbg.getvalue()).decode("ascii")
-            bg_href = f"data:image/png;base64,{b64}"
-        elif front_meta["type"] == "svg" and HAS_CAIROSVG:
-            png = cairosvg.svg2png(bytestring=front_meta["raw"], output_width=W, output_height=H)
-            b64 = base64.b64encode(png).decode("ascii"); bg_href = f"data:image/png;base64,{b64}"
-        else:
-            bg_href = None
-
-        for nome in names:
-            a = ajustes[nome]
-            dwg = svgwrite.Drawing(size=(W,H))
-            if bg_href:
-                dwg.add(dwg.image(href=bg_href, insert=(0,0), size=(W,H)))
-            # texto vetorial (aprox. centralizado)
-            dwg.add(dwg.text(
-                nome,
-                insert=(x_anchor + gdx + a["dx"], y_anchor + gdy + a["dy"]),
-                text_anchor="middle",
-                font_size=a["tamanho"],
-                font_family="Bentosa, Helvetica, Arial",
-                fill=color
-            ))
-            zf.writestr(f"{_safe_filename(nome)}.svg", dwg.tostring())
-    out.seek(0)
+    # fundo rasterizado (se houver): embutido em base64 ou, compartilhado, referenciado pelo caminho relativo
+    png = _fundo_png(front_meta, (W,H))
+    if png is None:
+        bg_href = None
+    elif compartilhado:
+        bg_href = SVG_FUNDO
+    else:
+        bg_href = "data:image/png;base64," + base64.b64encode(png).decode("ascii")
+    familia = "Bentosa, Helvetica, Arial"
+    if compartilhado:
+        # a fonte do trabalho vai no ZIP como SVG_FONTE (ver recursos_svg)
+        familia = "CertFonte, Helvetica, Arial"
+        defs = '<defs><style>@font-face{font-family:"CertFonte";src:url("%s")}</style></defs>' % SVG_FONTE
+    else:
+        defs = "<defs />"
+    cabeca = _SVG_RAIZ.format(W=W, H=H) + defs
+    if bg_href:
+        cabeca += f'<image height="{H}" width="{W}" x="0" xlink:href={quoteattr(bg_href)} y="0" />'
+    texto = (f'<text fill={quoteattr(color)} font-family="{familia}" font-size="{{tamanho}}" '
+             'text-anchor="{ancora}" x="{x}" y="{y}">{nome}</text></svg>')
+
+    def render(arquivo, nome, a):
+        with medicao.etapa("desenhar"):
+            svg = cabeca + texto.format(tamanho=a["tamanho"], ancora=a.get("ancora", "middle"), x=x_anchor + gdx + a["dx"],
+                                        y=y_anchor + gdy + a["dy"], nome=escape(nome))
+        return f"{arquivo}.svg", svg
+    return render
+
+def _subconjunto_fonte(raw: bytes, chars) -> bytes:
+    """A fonte só com os glifos de chars (com fontTools); sem fontTools ou se o
+       fontTools não conseguir ler o TTF, a fonte inteira."""
+    try:
+        from fontTools import subset
+    except ImportError:
+        return raw
+    opcoes = subset.Options()
+    opcoes.name_IDs = ["*"]
+    opcoes.notdef_outline = True
+    try:
+        fonte = subset.load_font(io.BytesIO(raw), opcoes)
+        sub = subset.Subsetter(opcoes)
+        sub.populate(text="".join(sorted(chars)))
+        sub.subset(fonte)
+        out = io.BytesIO()
+        subset.save_font(fonte, out, opcoes)
+    except Exception:
+        return raw
     return out.getvalue()
 
-def _export_eps_vector(front_meta, names, ajustes, size, anchor, gdx, gdy, color):
-    from reportlab.graphics.shapes import Drawing, Image as RLImage, String
-    from reportlab.graphics import renderPS
+def recursos_svg(front_meta, size, chars, fonte=None):
+    """(nome_arquivo, bytes) dos recursos do "SVG (vetor, compartilhado)": o fundo e a fonte
+       (fonte: bytes ou caminho do TTF, None = Bentosa; só com os caracteres usados nos nomes)."""
+    png = _fundo_png(front_meta, size)
+    if png is not None:
+        yield SVG_FUNDO, png
+    yield SVG_FONTE, _subconjunto_fonte(fontes.dados(fonte), chars)
+
+def _anotar_chars(itens, usados, nome=lambda item: item[1]):
+    """Repassa os itens guardando em `usados` os caracteres dos nomes."""
+    for item in itens:
+        usados.update(nome(item))
+        yield item
+
+def _export_svg_vector(front_meta, names, ajustes, size, anchor, gdx, gdy, color):
+    return _zip(_iter(_render_svg_vector(front_meta, size, anchor, gdx, gdy, color), _itens(names, ajustes)))
+
+def _render_eps_vector(front_meta, size, anchor, gdx, gdy, color, fonte=None):
+    import eps
     W,H = size; x_anchor,y_anchor = anchor
-    out = io.BytesIO()
-    with zipfile.ZipFile(out, "w") as zf:
-        # preparar fundo como PNG se houver
-        bg_png = None
-        if front_meta["type"] == "raster":
-            img = Image.open(io.BytesIO(front_meta["raw"])).convert("RGB").resize((W,H))
-            buf = io.BytesIO(); img.save(buf, format="PNG"); buf.seek(0); bg_png = buf
-        elif front_meta["type"] == "svg" and HAS_CAIROSVG:
-            png = cairosvg.svg2png(bytestring=front_meta["raw"], output_width=W, output_height=H)
-            bg_png = io.BytesIO(png)
-        for nome in names:
-            d = Drawing(W, H)
-            if bg_png:
-                d.add(RLImage(0,0,width=W,height=H,path=bg_png))
-            d.add(String(x_anchor + gdx + ajustes[nome]["dx"], y_anchor + gdy + ajustes[nome]["dy"],
-                         nome, textAnchor="middle", fontSize=ajustes[nome]["tamanho"], fillColor=HexColor(color)))
-            b = io.BytesIO(); renderPS.drawToFile(d, b, fmt="EPS"); b.seek(0)
-            zf.writestr(f"{_safe_filename(nome)}.eps", b.getvalue())
-    out.seek(0)
-    return out.getvalue()
+    # prólogo (fonte Type 42 + fundo) montado uma vez; cada certificado só acrescenta o nome
+    modelo = eps.ModeloEPS(W, H, _fundo_png(front_meta, (W,H)), fonte)
+    def render(arquivo, nome, a):
+        with medicao.etapa("codificar"):
+            data = modelo.codificar(nome, x_anchor + gdx + a["dx"], y_anchor + gdy + a["dy"], a["tamanho"], color,
+                                    a.get("ancora", "middle"))
+        return f"{arquivo}.eps", data
+    return render
+
+def _export_eps_vector(front_meta, names, ajustes, size, anchor, gdx, gdy, color, fonte=None):
+    return _zip(_iter(_render_eps_vector(front_meta, size, anchor, gdx, gdy, color, fonte), _itens(names, ajustes)))
 
-def _export_raster(front_meta, names, ajustes, size, anchor, gdx, gdy, color, fmt, px_width, dpi, jpg_quality):
+def _render_raster(front_meta, size, anchor, gdx, gdy, color, fmt, px_width, dpi, jpg_quality, filtro=None, fonte=None):
     W,H = size; x_anchor,y_anchor = anchor
-    out = io.BytesIO()
-    with zipfile.ZipFile(out, "w") as zf:
-        # base rasterizada para esse tamanho
-        if front_meta["type"] == "raster":
-            base_img = Image.open(io.BytesIO(front_meta["raw"])).convert("RGB").resize((W,H))
-        elif front_meta["type"] == "svg" and HAS_CAIROSVG:
-            png = cairosvg.svg2png(bytestring=front_meta["raw"], output_width=W, output_height=H)
-            base_img = Image.open(io.BytesIO(png)).convert("RGB")
-        else:
-            base_img = Image.new("RGB", (W,H), "white")
-        for nome in names:
-            a = ajustes[nome]
+    # px_width: o fundo é reduzido/ampliado uma vez e o nome é desenhado direto nessa resolução
+    s = px_width / W if px_width else 1.0
+    size = (max(1, round(W*s)), max(1, round(H*s)))
+    base_img = _fundo_img(front_meta, size, filtro)
+    if base_img is None:
+        base_img = Image.new("RGB", size, "white")
+    def render(arquivo, nome, a):
+        with medicao.etapa("desenhar"):
             img = base_img.copy(); draw = ImageDraw.Draw(img)
-            font = _font(a["tamanho"])
-            tw, th = draw.textbbox((0,0), nome, font=font)[2:]
-            x = (x_anchor + gdx + a["dx"]) - tw/2
-            y = (y_anchor + gdy + a["dy"]) - th//2
+            tamanho = max(1, round(a["tamanho"] * s))
+            font = _font(tamanho, fonte)
+            tw, th = fontes.bbox(fonte, tamanho, nome)[2:]
+            x = _x_inicio((x_anchor + gdx + a["dx"]) * s, tw, a)
+            y = (y_anchor + gdy + a["dy"]) * s - th//2
             draw.text((x,y), nome, font=font, fill=color)
-            buf = io.BytesIO()
+        buf = io.BytesIO()
+        with medicao.etapa("codificar"):
             if fmt == "PNG":
                 img.save(buf, format="PNG", dpi=(dpi,dpi))
             else:
                 img.save(buf, format="JPEG", quality=jpg_quality, dpi=(dpi,dpi))
-            buf.seek(0)
-            zf.writestr(f"{_safe_filename(nome)}.{fmt.lower()}", buf.getvalue())
-    out.seek(0)
-    return out.getvalue()
+        buf.seek(0)
+        return f"{arquivo}.{fmt.lower()}", buf.getvalue()
+    return render
+
+def _export_raster(front_meta, names, ajustes, size, anchor, gdx, gdy, color, fmt, px_width, dpi, jpg_quality,
+                   filtro=None, fonte=None):
+    return _zip(_iter(_render_raster(front_meta, size, anchor, gdx, gdy, color, fmt, px_width, dpi, jpg_quality, filtro, fonte),
+                      _itens(names, ajustes)))
+
+def iter_pdf_unico(frente, verso, size, textos, arquivo="certificados", paginas_por_arquivo=0, verso_size=None):
+    """Um PDF multipágina para a lista toda, em vez de um PDF por pessoa.
+
+    frente/verso (PIL.Image ou bytes PNG; verso pode ser None) entram UMA vez como
+    Form XObject e cada página só acrescenta o nome. textos: iterável de funções
+    desenhar(canvas), uma por certificado. Com paginas_por_arquivo > 0, divide em
+    arquivo_001.pdf, arquivo_002.pdf, ... (frente e verso nunca ficam separados).
+    """
+    from reportlab.pdfgen import canvas as pdf_canvas
+    from reportlab.lib.utils import ImageReader
+    W,H = size
+    VW,VH = verso_size or size
+    por_cert = 2 if verso is not None else 1
+    certs_por_arquivo = max(1, paginas_por_arquivo // por_cert) if paginas_por_arquivo else 0
+    reader = lambda im: ImageReader(io.BytesIO(im) if isinstance(im, bytes) else im)
+
+    def abrir():
+        buf = io.BytesIO()
+        c = pdf_canvas.Canvas(buf, pagesize=(W,H))
+        with medicao.etapa("modelo"):
+            if frente is not None:
+                c.beginForm("frente", 0, 0, W, H)
+                c.drawImage(reader(frente), 0, 0, width=W, height=H)
+                c.endForm()
+            if verso is not None:
+                c.beginForm("verso", 0, 0, VW, VH)
+                c.drawImage(reader(verso), 0, 0, width=VW, height=VH)
+                c.endForm()
+        return buf, c
+
+    def paginas(c, desenhar):
+        c.setPageSize((W,H))
+        if frente is not None:
+            c.doForm("frente")
+        with medicao.etapa("desenhar"):
+            desenhar(c)
+        c.showPage()
+        if verso is not None:
+            c.setPageSize((VW,VH))
+            c.doForm("verso")
+            c.showPage()
+
+    buf = c = None
+    parte = n = 0
+    for desenhar in textos:
+        if c is None:
+            buf, c = abrir()
+        medicao.chamar(paginas, c, desenhar)
+        n += 1
+        if certs_por_arquivo and n == certs_por_arquivo:
+            parte += 1
+            with medicao.etapa("codificar"):
+                c.save()
+            yield f"{arquivo}_{parte:03d}.pdf", buf.getvalue()
+            buf = c = None
+            n = 0
+    if c is not None:
+        with medicao.etapa("codificar"):
+            c.save()
+        yield (f"{arquivo}_{parte+1:03d}.pdf" if certs_por_arquivo else f"{arquivo}.pdf"), buf.getvalue()
+
+def _iter_pdf_unico_vector(front_meta, verso_meta, itens, size, anchor, gdx, gdy, color, paginas_por_arquivo,
+                           fonte=None):
+    """Mesmo texto do _render_pdf_vector, mas todas as pessoas num PDF só."""
+    from reportlab.lib.colors import HexColor
+    x_anchor,y_anchor = anchor
+    font_name = fontes.reportlab(fonte)
+    def texto(nome, a):
+        def desenhar(c):
+            c.setFont(font_name, a["tamanho"])
+            c.setFillColor(HexColor(color))
+            tw = fontes.largura_pdf(font_name, a["tamanho"], nome)
+            c.drawString(_x_inicio(x_anchor + gdx + a["dx"], tw, a), y_anchor + gdy + a["dy"], nome)
+        return desenhar
+    front_png = _fundo_png(front_meta, size)
+    verso_png = _fundo_png(verso_meta, size) if verso_meta is not None else None
+    return iter_pdf_unico(front_png, verso_png, size, (texto(nome, a) for _, nome, a in itens),
+                          paginas_por_arquivo=paginas_por_arquivo)
+
+def renderizador_exportacao(base_meta, verso_meta, base_size, x_anchor, y_anchor,
+                            gdx, gdy, color, formato, px_width=None, dpi=300, jpg_quality=95, filtro=None, fonte=None):
+    """Prepara o fundo uma vez e devolve render(arquivo, nome, ajuste) -> (nome_arquivo, bytes).
+       px_width: largura em px das saídas PNG/JPEG (None = a do modelo), com o filtro de cache.FILTROS.
+       fonte: bytes ou caminho do TTF do nome (None = Bentosa, ver fontes.py); o SVG só a leva no
+       "SVG (vetor, compartilhado)" (ver recursos_svg)."""
+    anchor = (x_anchor, y_anchor)
+    if formato == "PDF (vetor)":
+        return _render_pdf_vector(base_meta, verso_meta, base_size, anchor, gdx, gdy, color, fonte)
+    if formato in ("SVG (vetor)", "SVG (vetor, compartilhado)"):
+        return _render_svg_vector(base_meta, base_size, anchor, gdx, gdy, color,
+                                  compartilhado=formato == "SVG (vetor, compartilhado)")
+    if formato == "EPS (vetor)":
+        return _render_eps_vector(base_meta, base_size, anchor, gdx, gdy, color, fonte)
+    # Raster
+    fmt = "PNG" if formato == "PNG" else "JPEG"
+    return _render_raster(base_meta, base_size, anchor, gdx, gdy, color, fmt, px_width, dpi, jpg_quality, filtro, fonte)
+
+def iter_exportacao(base_meta, verso_meta, itens, base_size, x_anchor, y_anchor,
+                    gdx, gdy, color, formato, px_width=None, dpi=300, jpg_quality=95, workers=1,
+                    paginas_por_arquivo=0, disco=None, filtro=None, fonte=None):
+    """Gera (nome_arquivo, bytes) por pessoa, sem montar o ZIP.
+       itens: iterável de (arquivo_sem_extensao, nome, {"dx","dy","tamanho"}); o ajuste pode ter
+       "ancora" ("start"/"middle"/"end", padrão "middle"): o x é o início, o meio ou o fim do nome.
+       workers > 1 renderiza em processos separados, mantendo a ordem dos itens.
+       "PDF (vetor, único)" gera um PDF só (ou partes de paginas_por_arquivo páginas).
+       disco: cache_disco.CacheDisco; só os itens que mudaram desde a última exportação são renderizados.
+       "SVG (vetor, compartilhado)" acrescenta, depois dos SVGs, o fundo e a fonte que eles referenciam.
+    """
+    if formato == "PDF (vetor, único)":
+        return _iter_pdf_unico_vector(base_meta, verso_meta, itens, base_size, (x_anchor, y_anchor),
+                                      gdx, gdy, color, paginas_por_arquivo, fonte)
+    args = (base_meta, verso_meta, base_size, x_anchor, y_anchor, gdx, gdy, color, formato, px_width, dpi, jpg_quality,
+            filtro, fonte)
+    if formato == "SVG (vetor, compartilhado)":
+        usados = set()
+        entradas = _iter_por_pessoa(args, _anotar_chars(itens, usados), workers, disco)
+        return _com_recursos(entradas, lambda: recursos_svg(base_meta, base_size, usados, fonte))
+    return _iter_por_pessoa(args, itens, workers, disco)
+
+def _iter_por_pessoa(args, itens, workers, disco):
+    base_meta, verso_meta = args[:2]
+    def gerar(itens):
+        if workers > 1:
+            return pool.mapear(renderizador_exportacao, args, itens, workers)
+        return _iter(renderizador_exportacao(*args), itens)
+    if disco is None:
+        return gerar(itens)
+    meta = lambda m: None if m is None else (m.get("type"), cache.hash_bytes(m["raw"]))
+    base = cache.hash_partes(cache_disco.VERSAO, "utils", meta(base_meta), meta(verso_meta),
+                             fontes.registrar(args[-1]), args[2:-1])
+    chave_de = lambda item: cache.hash_partes(base, item)
+    reaproveitados = cache_disco.reaproveitar(itens, chave_de, lambda its: ([r] for r in gerar(its)), disco)
+    return (entradas[0] for _, entradas in reaproveitados)
+
+def _com_recursos(entradas, recursos):
+    yield from entradas
+    yield from recursos()
 
 def exportar_zip(frente_file, verso_file, nomes, ajustes, base_meta, base_size, x_anchor, y_anchor,
-                 gdx, gdy, color, formato, px_width, dpi, jpg_quality, padrao_nome):
+                 gdx, gdy, color, formato, px_width, dpi, jpg_quality, padrao_nome, destino=None, workers=1,
+                 paginas_por_arquivo=0, relatorio=None, disco=None, filtro=None):
     """Gera um ZIP contendo arquivos individuais no formato desejado.
        (padrao_nome é aplicado substituindo {name})
+       Com destino (caminho ou arquivo), o ZIP é gravado nele conforme cada arquivo fica pronto.
+       workers > 1 usa vários processos (a ordem no ZIP continua a da lista).
+       relatorio: caminho de um JSON com o tempo por etapa (ver medicao.py).
+       disco: cache_disco.CacheDisco (ex.: cache_disco.padrao()); reexportar só renderiza o que mudou.
+       px_width/dpi: resolução das saídas PNG/JPEG; filtro: redimensionamento do fundo (ver cache.FILTROS).
     """
+    if relatorio is not None and not medicao.ativo():
+        with medicao.medir() as m:
+            z = exportar_zip(frente_file, verso_file, nomes, ajustes, base_meta, base_size, x_anchor, y_anchor,
+                             gdx, gdy, color, formato, px_width, dpi, jpg_quality, padrao_nome,
+                             destino, workers, paginas_por_arquivo, disco=disco, filtro=filtro)
+        m.salvar(relatorio)
+        return z
     # Padrão de nomes
     nomes_safe = [ (padrao_nome or "{name}").format(name=_safe_filename(n)) for n in nomes ]
     # Ajustes com nomes já normalizados
@@ -240,12 +463,7 @@ def exportar_zip(frente_file, verso_file, nomes, ajustes, base_meta, base_size,
     if verso_file is not None:
         _, verso_meta = carregar_base_preview(verso_file)
 
-    if formato == "PDF (vetor)":
-        return _export_pdf_vector(base_meta, verso_meta, nomes_safe, ajustes_safe, base_size, (x_anchor,y_anchor), gdx, gdy, color)
-    if formato == "SVG (vetor)":
-        return _export_svg_vector(base_meta, nomes_safe, ajustes_safe, base_size, (x_anchor,y_anchor), gdx, gdy, color)
-    if formato == "EPS (vetor)":
-        return _export_eps_vector(base_meta, nomes_safe, ajustes_safe, base_size, (x_anchor,y_anchor), gdx, gdy, color)
-    # Raster
-    fmt = "PNG" if formato == "PNG" else "JPEG"
-    return _export_raster(base_meta, nomes_safe, ajustes_safe, base_size, (x_anchor,y_anchor), gdx, gdy, color, fmt, px_width, dpi, jpg_quality)
+    entradas = iter_exportacao(base_meta, verso_meta, _itens(nomes_safe, ajustes_safe), base_size,
+                               x_anchor, y_anchor, gdx, gdy, color, formato, px_width, dpi, jpg_quality, workers,
+                               paginas_por_arquivo, disco, filtro)
+    return _zip(entradas, destino)